@@ -1,12 +1,14 @@
 from entity import Entity
 import config
-import pygame
 import math
-import random
+import numpy as np
 from redeneural import RedeNeural
+from seeds import default_generator, NETWORK
+from features import FeatureSet, AgentSource
+from perf import timers
 
 class Agent(Entity):
-    def __init__(self, ID, begin, end, team, screen, color=config.AGENT_COLOR, target=None, players=None):
+    def __init__(self, ID, begin, end, team, screen, color=config.AGENT_COLOR, target=None, players=None, brain=None):
         largura = end[0] - begin[0]
         altura = end[1] - begin[1]
         self.ID = ID
@@ -14,8 +16,12 @@ class Agent(Entity):
         self.type = "AGENT"
         self.walking = 0
         
-        # Ajuste o input_size para 9 elementos conforme sua necessidade
-        self.brain = RedeNeural(input_size=config.INPUT_SIZE_LAYER) 
+        # Cérebro recebido pronto ou, sem ele, criado no primeiro uso (ver brain abaixo)
+        self._brain = brain
+        # Observação: features escolhidas em um buffer fixo; o adversário é achado no primeiro update
+        self.features = FeatureSet(config.FEATURES)
+        self.obs = np.empty(self.features.size)
+        self.opponent = None
 
         # Usa a menor dimensão para escalar variáveis de tamanho
         size = min(largura, altura)
@@ -42,115 +48,36 @@ class Agent(Entity):
         # --- NOVIDADE 1: Variável para saber se é o líder ---
         self.is_leader = False
 
-        self.rect = pygame.Rect(int(self.x - self.radius), int(self.y - self.radius), int(self.radius * 2), int(self.radius * 2))
+    @property
+    def brain(self):
+        # Rede aleatória só quando alguém usa: Quadras que só desenham (o estado vem do
+        # ArenaBatch) nunca inicializam pesos que seriam jogados fora. Pesos de um stream fixo
+        # por time, nunca do np.random global
+        if self._brain is None:
+            self._brain = RedeNeural(input_size=config.INPUT_SIZE_LAYER, rng=default_generator(NETWORK, self.team))
+        return self._brain
+
+    @brain.setter
+    def brain(self, brain):
+        self._brain = brain
 
     def update(self):
         self.walking = 0
         if self.target is None:
             return
+        t = timers.start()
 
-        # 1. Constantes para Normalização
-        width = self.end[0] - self.begin[0]
-        height = self.end[1] - self.begin[1]
-        MAX_DIST = math.hypot(width, height)  # Diagonal da quadra
-
-        # 1. Constantes da Quadra
-        width = self.end[0] - self.begin[0]
-        height = self.end[1] - self.begin[1]
-        MAX_DIST = math.hypot(width, height)
-
-        
-        my_x_norm = (self.x - self.begin[0]) / width
-        my_y_norm = (self.y - self.begin[1]) / height
-
-        
-
-       # -----------------------------------------------------------
-        # CÁLCULO DOS INPUTS (O resto continua igual)
-        # -----------------------------------------------------------
-
-        # A) BOLA
-        dx_bola = self.target.x - self.x
-        dy_bola = self.target.y - self.y
-
-        ball_x = (self.target.x - self.begin[0]) / width  
-        ball_y = (self.target.y - self.begin[1]) / height  
-
-        dist_bola = math.hypot(dx_bola, dy_bola)
-        ang_bola = math.atan2(dy_bola, dx_bola)
-        dir_bola = math.atan2(self.target.vy, self.target.vx)
+        # Entradas da rede: só as features de config.FEATURES, no buffer do agente
+        if self.opponent is None:
+            self.opponent = next((p for p in self.players if p.ID != self.ID), None)
+        inputs_atuais = self.features.compute(AgentSource(self, self.opponent), self.obs)
 
-        # B) ADVERSÁRIO
-        opponent = None
-        for p in self.players:
-            if p.ID != self.ID:
-                opponent = p
-                break
-        
-        if opponent:
-            opponent_x = (opponent.x - self.begin[0]) / width  
-            opponent_y = (opponent.y - self.begin[1]) / height  
-            dx_adv = opponent.x - self.x
-            dy_adv = opponent.y - self.y
-            dist_adv = math.hypot(dx_adv, dy_adv)
-            ang_adv = math.atan2(dy_adv, dx_adv)
-            ovx = getattr(opponent, 'vx', 0)
-            ovy = getattr(opponent, 'vy', 0)
-            dir_adv = math.atan2(ovy, ovx)
-        else:
-            dist_adv = 0
-            ang_adv = 0
-            dir_adv = 0
-
-        # C) GOL INIMIGO
-        dx_gol = self.attack_goal_x - self.x
-        dy_gol = self.attack_goal_y - self.y
-        dist_gol = math.hypot(dx_gol, dy_gol)
-        ang_gol = math.atan2(dy_gol, dx_gol)
-
-        gol_x = (self.attack_goal_x - self.begin[0]) / width 
-        gol_y = (self.attack_goal_y - self.begin[1]) / height 
-
-        # D) SINAL DE DIREÇÃO
-        direction_sign = 1 if self.team == 0 else -1
-
-        # -----------------------------------------------------------
-        # LISTA DE INPUTS ATUALIZADA (Total: 11 inputs)
-        # -----------------------------------------------------------
-        # inputs_atuais = [
-        #     my_x_norm,         
-        #     my_y_norm,          
-        #     dist_bola / MAX_DIST,
-        #     ang_bola / math.pi,
-        #     dir_bola / math.pi,
-        #     dist_adv / MAX_DIST,
-        #     ang_adv / math.pi,
-        #     dir_adv / math.pi,
-        #     dist_gol / MAX_DIST,
-        #     ang_gol / math.pi,
-        #     direction_sign
-        # ]
-
-        inputs_atuais = [
-            my_x_norm,         
-            my_y_norm,
-            ball_x,
-            ball_y,
-            opponent_x,   
-            opponent_y,
-            gol_x,   
-            gol_y,
-            direction_sign   
-        ]
-        
         # --- REDE NEURAL ---
         # Recebe a decisão da rede
+        t = timers.lap('observe', t)
         ax, ay = self.brain.feedForward(inputs_atuais)
+        t = timers.lap('infer', t)
 
-        modulo_ax = ax if ax > 0 else -ax
-        modulo_ay = ay if ay > 0 else -ay
-
-        
         # Aplica aceleração
         self.vx += ax * self.acceleration
         self.vy += ay * self.acceleration
@@ -190,15 +117,16 @@ class Agent(Entity):
             self.vy *= -0.5
         
         self.walking = (oldx - self.x if oldx>self.x else self.x - oldx ) +  (oldy - self.y if oldy>self.y else self.y - oldy )
+        timers.lap('players', t)
 
-        self.rect.center = (int(self.x), int(self.y))
-        self.draw()
-
-def draw(self):
+    def draw(self, surface=None):
+        import pygame
+        if surface is None:
+            surface = self.screen
         # Chama o desenho normal (círculo azul)
-        super().draw()
+        super().draw(surface)
         
         # Se for o líder, desenha um anel dourado e o fitness em cima
         if self.is_leader:
             # Anel Dourado
-            pygame.draw.circle(self.screen, (255, 215, 0), (int(self.x), int(self.y)), self.radius + 4, 3)
\ No newline at end of file
+            pygame.draw.circle(surface, (255, 215, 0), (int(self.x), int(self.y)), self.radius + 4, 3)
@@ -1,25 +1,27 @@
-import pygame
-import pickle
 import os
-import math
-import random 
 from datetime import datetime
-import numpy as np
 
 # Importa as classes do seu projeto
-from quadra import Quadra
-from redeneural import RedeNeural
-from sidebar import Sidebar 
-from bot import Bot # <--- Importante: Oponente padrão
+from populacao import Populacao, Individuo
+from evaluator import MatchEvaluator, grid_geometry
+from checkpoint import Checkpoint
+from seeds import SeedStreams
+from replay import record_best
+from perf import timers
+from modelo import save_model, MODEL_EXT
 import config
 
+# Em modo headless nada de pygame (nem a janela/Sidebar, que dependem dele)
+if not config.HEADLESS:
+    from training_view import TrainingView
+
 # --- CONFIGURAÇÕES ---
-TIME_PER_MATCH = 10      
+TICKS_PER_MATCH = 10 * config.TICKS_PER_SECOND # Duração da partida em ticks (10s de jogo)
 MATCHES_PER_AGENT = 3     # 3 Rodadas para provar que é bom contra o Bot
 ELITISM_PERCENT = 0.1     
 
 # Ajustamos a população para caber 1 Agente por quadra (o outro slot é do Bot)
-POPULATION_SIZE = config.ROWS * config.COLUMNS 
+POPULATION_SIZE = config.QUADRAS 
 
 # --- CONFIGURAÇÕES DE FASES ---
 MUT_RATE_EXPLORE = 0.30  
@@ -31,41 +33,13 @@ MUT_SCALE_2 = 0.25
 MUT_RATE_REFINE = 0.08   
 MUT_SCALE_REFINE = 0.10  
 
-class Candidate:
-    def __init__(self, brain):
-        self.brain = brain
-        self.fitness = 0 
-
 def save_best_model(brain, prefix):
     if not os.path.exists("models"): os.makedirs("models")
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"models/best_{prefix}_{timestamp}.pkl"
-    with open(filename, 'wb') as f: pickle.dump(brain, f)
+    filename = f"models/best_{prefix}_{timestamp}{MODEL_EXT}"
+    save_model(brain, filename, meta={'prefix': prefix})
     print(f"✅ Modelo {prefix} salvo: {filename}")
 
-def evolve_candidates(candidate_list, target_size, mutation_rate, mutation_scale):
-    candidate_list.sort(key=lambda x: x.fitness, reverse=True)
-    new_candidates = []
-    
-    num_elites = int(target_size * ELITISM_PERCENT)
-    if num_elites < 1: num_elites = 1
-    
-    for i in range(num_elites):
-        if i < len(candidate_list):
-            new_candidates.append(Candidate(candidate_list[i].brain.copy()))
-            
-    remaining = target_size - len(new_candidates)
-    parent_pool = candidate_list[:int(len(candidate_list)/2)]
-    if not parent_pool: parent_pool = candidate_list
-    
-    for _ in range(remaining):
-        parent = np.random.choice(parent_pool)
-        child_brain = parent.brain.copy()
-        child_brain.mutate(mutation_rate=mutation_rate, mutation_scale=mutation_scale)
-        new_candidates.append(Candidate(child_brain))
-        
-    return new_candidates, candidate_list[0].fitness
-
 def get_phase_params(total_goals):
     if total_goals == 0:
         return MUT_RATE_EXPLORE, MUT_SCALE_EXPLORE, "EXPLORE"
@@ -75,12 +49,17 @@ def get_phase_params(total_goals):
         return MUT_RATE_REFINE, MUT_SCALE_REFINE, "REFINE"
 
 def main():
-    pygame.init()
-    screen = pygame.display.set_mode((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
-    sidebar = Sidebar(screen, config.GAME_WIDTH, config.SIDEBAR_WIDTH, config.WINDOW_HEIGHT)
-    pygame.display.set_caption(f"Neural HaxBall - Agent vs Bot (Robust)")
+    view = None
+    sidebar = None
+    if not config.HEADLESS:
+        view = TrainingView(f"Neural HaxBall - Agent vs Bot (Robust)")
+        sidebar = view.sidebar
 
-    clock = pygame.time.Clock()
+    # Todos os sorteios do treino saem de streams da semente (--seed=N repete o treino)
+    streams = SeedStreams(config.SEED)
+
+    # Partidas rodam em lote (e em paralelo com --workers=N no headless)
+    evaluator = MatchEvaluator('vs_bot', config.WORKERS)
     
     # --- CONTADORES DE FASE ---
     total_goals_agent = 0
@@ -91,172 +70,119 @@ def main():
     except:
         input_sz = 11
 
-    # População Única (Só os Agentes que aprendem)
-    population = [Candidate(RedeNeural(input_size=input_sz)) for _ in range(POPULATION_SIZE)]
+    # População Única (Só os Agentes que aprendem): matriz (indivíduos x genoma)
+    population = Populacao(POPULATION_SIZE, input_size=input_sz, rng=streams.population(0))
     
     generation = 1
-    if len(sidebar.fitness_history) > 0:
+    if sidebar and len(sidebar.fitness_history) > 0:
         generation = len(sidebar.fitness_history) + 1
+
+    # Checkpoint do treino inteiro (populações, RNGs, contadores); --resume continua de onde parou
+    checkpoint = Checkpoint("agent_vs_bot")
+    if config.RESUME and checkpoint.exists():
+        generation, _, history = checkpoint.load({'population': population}, streams)
+        # (os gols da fase salvos são só registro: a fase recomeça do zero a cada geração)
+        if sidebar:
+            sidebar.load_history(history)
+        print(f"Retomando do checkpoint: Geração {generation}")
+    else:
+        checkpoint.reset()
+    print(f"Semente dos sorteios: {streams.entropy}")
     
     running_program = True
     
     while running_program:
-        # Zera fitness acumulado da geração
-        for c in population: c.fitness = 0
-        
+        # Fitness acumulado da geração começa zerado (Populacao.evolve zera)
+        # e os gols da fase contam só a geração atual
+        total_goals_agent = 0
+
         print(f"--- Geração {generation} (Vs Bot) ---")
         
+        # CRIAÇÃO DAS PARTIDAS: 'agent' (Esq) vs 'bot' (Dir), 1 agente por quadra, em cada round.
+        # Uma semente por partida (sorteios do Bot), independente da divisão entre workers
+        rounds = [([population.lote(), None], streams.match_seeds(generation, match_round, population.size))
+                  for match_round in range(1, MATCHES_PER_AGENT + 1)]
+        # Sem janela os rounds (independentes) viram uma fila só: a quadra que termina cedo
+        # já começa a próxima partida, sem esperar o fim do round
+        streamed = evaluator.run_rounds(rounds, TICKS_PER_MATCH) if view is None else None
+
         # Loop de Rounds (Robustez)
         for match_round in range(1, MATCHES_PER_AGENT + 1):
-            quadras = []
-            agent_to_candidate_map = {}
-            active_agents = [] # Lista visual dos agentes na tela
-            
-            cell_width = config.GAME_WIDTH / config.COLUMNS
-            cell_height = config.WINDOW_HEIGHT / config.ROWS
+            brains, seeds = rounds[match_round - 1]
+
+            on_tick = None
+            if view is not None:
+                begin, end = grid_geometry(population.size)
+                view.begin_round(begin, end, ['agent', 'bot'])
+
+                def on_tick(batch, fitness, goals, ticks):
+                    # Entre um frame e outro a simulação segue sem desenhar
+                    if not view.frame_due():
+                        return
+                    action = view.poll_events()
+                    if action == 'save':
+                        save_best_model(population.brain(population.best()), "AGENT_VS_BOT")
+                    if action is not None:
+                        return False
+
+                    # Sidebar (o candidato i joga na quadra i)
+                    k = population.best()
+                    best_cand_global = Individuo(population.brain(k), population.fitness[k], k, 0)
+
+                    goals_agent = total_goals_agent + int(goals[:, 0].sum())
+                    _, _, status = get_phase_params(goals_agent)
+                    status_txt = f"Phase: {status} | Goals: {goals_agent}"
 
-            # Distribui Agentes nas Quadras (1 por quadra)
-            for i in range(len(population)):
-                row = i // config.COLUMNS
-                col = i % config.COLUMNS
-                cx = col * cell_width
-                cy = row * cell_height
-                
-                # CRIAÇÃO DA QUADRA: 'agent' (Esq) vs 'bot' (Dir)
-                q = Quadra(screen, (cx, cy), (cx + cell_width, cy + cell_height), ['agent', 'bot'])
-                quadras.append(q)
-                
-                candidate = population[i]
-                
-                for p in q.players:
-                    if p.type == 'AGENT':
-                        # Configura o Agente (Time 0 - Esquerda)
-                        p.fitness = 0 
-                        p.brain = candidate.brain
-                        agent_to_candidate_map[p] = candidate
-                        active_agents.append(p)
-                    elif p.type == 'BOT':
-                        # Bot já vem configurado pela classe Quadra/Bot
-                        pass
-
-            start_time = pygame.time.get_ticks()
-            running_match = True
-            
-            while running_match:
-                clock.tick(60) # Mantém 60 FPS fixo (Sem Turbo)
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running_program = False
-                        running_match = False
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_q:
-                        best_cand = max(population, key=lambda c: c.fitness)
-                        save_best_model(best_cand.brain, "AGENT_VS_BOT")
-                        running_program = False
-                        running_match = False
-
-                elapsed = (pygame.time.get_ticks() - start_time) / 1000
-                if elapsed >= TIME_PER_MATCH:
-                    running_match = False
-
-                screen.fill((0, 0, 0))
-                ended = True
-                
-                for q in quadras:
-                    if q.status == 0: ended = False
-                    q.update()
-                    
-                    for agent in q.players:
-                        if agent.type != 'AGENT' or q.status != 0: continue
-                        
-                        # --- FITNESS (Mesma lógica robusta) ---
-                        
-                        # 1. Pressão / Ataque (Quer bola na direita > 0.5)
-                        ball_relative_x = (q.ball.x - q.begin[0]) / q.largura
-                        reward = 0
-                        
-                        # Como Agent é sempre Time 0 (Esquerda) neste modo:
-                        if ball_relative_x > 0.5: 
-                            reward = (0.02 + ((ball_relative_x - 0.5) * 0.1))/10
-                        else: 
-                            agent.fitness -= 0.01
-                        
-                        agent.fitness += reward
-
-                        # 2. Gol e DETECÇÃO DE FASE
-                        if q.pontuou:
-                            # Se o Agente (Time 0) fez gol
-                            if agent.team == 1: # Time que marcou é o do agente
-                                total_goals_agent += 1
-                                print(f"> GOL DO AGENTE! Total: {total_goals_agent}")
-                                
-                                my_score = q.score[agent.team]
-                                agent.fitness += my_score * 50
-                            
-                            # Se tomou gol do Bot
-                            else: 
-                                enemy_score = q.score[1 - agent.team]
-                                agent.fitness -= enemy_score * 20
-                            
-                            if q.players[-1] == agent: q.pontuou = False 
-
-                        agent.fitness -= 0.001 
-                        if agent.walking == 0: agent.fitness -= 0.1 
-
-                if ended: running_match = False
-
-                # Desenha UI
-                if active_agents:
-                    best_vis = max(active_agents, key=lambda a: a.fitness)
-                    
                     # Highlight no melhor agente
-                    pygame.draw.rect(screen, config.LEFT_WIN_COLOR, [best_vis.begin[0], best_vis.begin[1], best_vis.end[0]-best_vis.begin[0], best_vis.end[1]-best_vis.begin[1]], 4)
-                    
-                    # Sidebar
-                    best_cand_global = max(population, key=lambda c: c.fitness)
-                    
-                    _, _, status = get_phase_params(total_goals_agent)
-                    status_txt = f"Phase: {status} | Goals: {total_goals_agent}"
-
-                    sidebar.draw(generation, match_round, MATCHES_PER_AGENT, best_cand_global, TIME_PER_MATCH - elapsed, status_txt)
-
-                pygame.display.flip()
-            
-            if not running_program: break
+                    view.draw(batch, fitness, [(0, config.LEFT_WIN_COLOR, 4)],
+                              (generation, match_round, MATCHES_PER_AGENT, (TICKS_PER_MATCH - ticks) / config.TICKS_PER_SECOND, status_txt),
+                              best_cand_global)
+
+            if streamed is not None:
+                result = streamed[match_round - 1]
+            else:
+                result = evaluator.run(brains, TICKS_PER_MATCH, seeds, on_tick)
+            if result is None:
+                running_program = False
+                break
+            fitness, goals, _ = result
+            # Replay das melhores partidas (simuladas de novo a partir das sementes)
+            if config.RECORD_BEST and generation % config.RECORD_EVERY == 0:
+                record_best("agent_vs_bot", generation, match_round, evaluator.mode, brains, TICKS_PER_MATCH, seeds, fitness)
             
             # Soma Fitness do Round ao Candidato
-            for q in quadras:
-                for agent in q.players:
-                    if agent.type == 'AGENT':
-                        my_score = q.score[agent.team]
-                        enemy_score = q.score[1 - agent.team]
-                        
-                        # Recompensa final da partida
-                        agent.fitness += my_score * 100
-                        agent.fitness -= enemy_score * 50
-                        
-                        candidate = agent_to_candidate_map[agent]
-                        candidate.fitness += agent.fitness
+            population.fitness += fitness[:, 0]
+
+            # Gols do Agente (Time 0) para a detecção de fase
+            total_goals_agent += int(goals[:, 0].sum())
+            print(f"> Round {match_round} | Gols do Agente: {total_goals_agent}")
 
         if not running_program: break
 
         # --- AUTO SAVE ---
         if generation % 20 == 0:
-            best_cand = max(population, key=lambda c: c.fitness)
-            save_best_model(best_cand.brain, f"AUTO_VSBOT_GEN{generation}")
+            save_best_model(population.brain(population.best()), f"AUTO_VSBOT_GEN{generation}")
             
         # --- EVOLUÇÃO ---
         rate, scale, _ = get_phase_params(total_goals_agent)
-        population, fit_best = evolve_candidates(population, POPULATION_SIZE, rate, scale)
+        fit_best = population.evolve(ELITISM_PERCENT, rate, scale, streams.evolution(0, generation))
         
         avg_fitness = fit_best / MATCHES_PER_AGENT
         print(f"Gen {generation} Finalizada | Best (Avg): {avg_fitness:.2f}")
+        # Onde foi o tempo da geração (física, rede, recompensas, desenho, GA)
+        print(timers.log_line(timers.end_generation()))
         
-        sidebar.update_history(avg_fitness)
+        if sidebar:
+            sidebar.update_history(avg_fitness)
+        checkpoint.append_history(avg_fitness)
         generation += 1
-        total_goals_agent = 0 # Reseta contagem de gols da geração
 
-    pygame.quit()
+        if (generation - 1) % config.CHECKPOINT_EVERY == 0:
+            checkpoint.save(generation, {'population': population}, {'total_goals_agent': total_goals_agent}, streams)
+
+    evaluator.close()
+    if view is not None:
+        view.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,555 @@
+import random
+import numpy as np
+import config
+from redeneural import RedeNeuralLote
+from features import FeatureSet, BatchSource
+from arena_state import STATE_DTYPE, ArenaState, check_size, rng_state, rng_from_state
+from perf import timers
+
+# ========================
+# MOTOR DE FÍSICA VETORIZADO (struct-of-arrays)
+# ========================
+# Simula N quadras 1v1 de uma vez com arrays NumPy, seguindo as mesmas regras de
+# Quadra.step: colisão jogador x jogador, Ball.movimentacao (fricção, paredes, gols,
+# colisão com jogadores) e depois o update de cada jogador, na ordem dos slots.
+# Jogadores suportados: 'agent' e 'bot' (o 'player' humano depende do teclado).
+
+# Mesmos valores usados em Agent/Bot
+ACCELERATION = 0.6
+FRICTION = 0.85
+
+# Mesmos valores usados em Ball
+KICK_POWER = 2.5
+KICK_PLAYER_FACTOR = 0.4
+MAX_BALL_SPEED = 15
+BALL_STOP_SPEED = 0.05
+BALL_BOUNCE = -0.8
+PLAYER_BOUNCE = -0.5
+
+# Colisão jogador x jogador (Quadra.check_entities_collision)
+PLAYER_COLLISION_DAMPING = 0.7
+
+# Bot "parado" (Bot.update)
+BOT_STUCK_FRAMES = 60
+BOT_JITTER = 10
+
+# Status de uma quadra sem partida (ex: fila do agendador vazia); além de 0 (em andamento),
+# 1 e 2 (vitória da esquerda / direita), como na Quadra. Só quadras com status 0 simulam.
+STATUS_IDLE = 3
+
+
+class ArenaBatch:
+    def __init__(self, begin, end, players):
+        """
+        begin, end: arrays (N, 2) com os cantos de cada quadra (mesmo significado de Quadra)
+        players: tipos dos dois slots, ex: ['agent', 'bot'] (iguais para todas as quadras)
+        """
+        for p in players:
+            if p not in ('agent', 'bot'):
+                raise ValueError(f"ArenaBatch só simula 'agent' e 'bot', recebeu '{p}'")
+        if len(players) != 2:
+            raise ValueError("ArenaBatch simula partidas 1v1 (2 jogadores por quadra)")
+
+        self.players = list(players)
+        self.begin = np.array(begin, dtype=np.float64).reshape(-1, 2)
+        self.end = np.array(end, dtype=np.float64).reshape(-1, 2)
+        self.n = len(self.begin)
+        self._rows = np.arange(self.n)
+
+        largura = self.end[:, 0] - self.begin[:, 0]
+        altura = self.end[:, 1] - self.begin[:, 1]
+        self.largura = largura
+        self.altura = altura
+
+        # --- GEOMETRIA (mesmas fórmulas de Ball, Player/Agent/Bot e Goal) ---
+        size = np.minimum(largura, altura)
+        self.ball_r = np.maximum(3, (size * config.RADIUS_SCALE * 0.5).astype(int)).astype(np.float64)
+        radius = np.maximum(4, (size * config.RADIUS_SCALE).astype(int)).astype(np.float64)
+        self.pr = np.stack([radius, radius], axis=1)
+        self.speed = np.full((self.n, 2), float(config.BOT_SPEED))
+
+        # Posições de saída (time 0 à esquerda, time 1 à direita)
+        self.start_x = np.stack([self.begin[:, 0] + radius * 4, self.end[:, 0] - radius * 4], axis=1)
+        self.center_x = self.begin[:, 0] + largura / 2
+        self.center_y = self.begin[:, 1] + altura / 2
+
+        # Traves: área (left, top, w, h) inteira, como Goal.area
+        goal_h = (altura * 0.35).astype(int)
+        goal_top = (self.begin[:, 1] + (altura - goal_h) // 2).astype(int)
+        depth = np.maximum(6, (largura * 0.04).astype(int))
+        self.goal_left_x = np.trunc(self.begin[:, 0] - depth)
+        self.goal_right_x = np.trunc(self.end[:, 0] - depth)
+        self.goal_w = (depth * 2).astype(np.float64)
+        self.goal_top = goal_top.astype(np.float64)
+        self.goal_h = goal_h.astype(np.float64)
+
+        # Gol que cada slot ataca (Agent.attack_goal_x / attack_goal_y)
+        self.attack_goal_x = np.stack([self.end[:, 0], self.begin[:, 0]], axis=1)
+        self.attack_goal_y = self.begin[:, 1] + altura / 2
+
+        # --- ESTADO --- (preenchido por reset: o mesmo lote serve para várias rodadas)
+        self.ball_x = np.empty(self.n)
+        self.ball_y = np.empty(self.n)
+        self.ball_vx = np.empty(self.n)
+        self.ball_vy = np.empty(self.n)
+
+        self.px = np.empty((self.n, 2))
+        self.py = np.empty((self.n, 2))
+        self.pvx = np.empty((self.n, 2))
+        self.pvy = np.empty((self.n, 2))
+        self.walking = np.empty((self.n, 2))
+        self.stuck_timer = np.empty((self.n, 2), dtype=np.int64)
+        # Aceleração (ax, ay) escolhida por cada slot no último tick (saída da rede ou do bot)
+        self.actions = np.empty((self.n, 2, 2))
+
+        self.score = np.empty((self.n, 2), dtype=np.int64)
+        self.status = np.empty(self.n, dtype=np.int8)
+        self.pontuou = np.empty(self.n, dtype=bool)
+        # Time que fez o último gol (-1 => nenhum ainda)
+        self.last_scorer = np.empty(self.n, dtype=np.int8)
+
+        # Sorteios do bot: um random.Random por quadra deixa cada partida reprodutível
+        # sozinha (ex: dividida entre processos); None usa o módulo random, como o Bot
+        self.rngs = None
+
+        # Cérebros dos slots 'agent' (um por quadra) em um RedeNeuralLote para inferência em lote
+        self.lotes = [None, None]
+
+        # Observações: só as features escolhidas, escritas em um buffer fixo por slot
+        # (a linha k é a k-ésima quadra em andamento do tick)
+        self.features = FeatureSet(config.FEATURES)
+        self._obs = [np.empty((self.n, self.features.size)) for _ in range(2)]
+        self.reset()
+
+    def same_geometry(self, begin, end, players):
+        """True se o lote simula exatamente essas quadras (pode ser reaproveitado com reset)"""
+        return (list(players) == self.players
+                and np.array_equal(np.asarray(begin, dtype=np.float64).reshape(-1, 2), self.begin)
+                and np.array_equal(np.asarray(end, dtype=np.float64).reshape(-1, 2), self.end))
+
+    def reset(self, brains=None, rngs=None):
+        """
+        Volta todas as quadras para a saída (placar zerado), reaproveitando os arrays.
+        brains: [slot 0, slot 1] como em set_brains (None mantém os cérebros do slot)
+        rngs: sorteios do bot por quadra (None => módulo random)
+        """
+        self.restart()
+        self.rngs = rngs
+        for s in range(2):
+            if brains is not None and brains[s] is not None:
+                self.set_brains(s, brains[s])
+
+    def restart(self, idx=slice(None)):
+        """Partida nova (saída, placar zerado) só nas quadras idx; cérebros e sorteios ficam"""
+        self.ball_x[idx] = self.center_x[idx]
+        self.ball_y[idx] = self.center_y[idx]
+        self.ball_vx[idx] = 0
+        self.ball_vy[idx] = 0
+
+        self.px[idx] = self.start_x[idx]
+        self.py[idx] = self.center_y[idx, None]
+        self.pvx[idx] = 0
+        self.pvy[idx] = 0
+        self.walking[idx] = 0
+        self.stuck_timer[idx] = 0
+        self.actions[idx] = 0
+
+        self.score[idx] = 0
+        self.status[idx] = 0
+        self.pontuou[idx] = False
+        self.last_scorer[idx] = -1
+
+    @classmethod
+    def from_quadras(cls, quadras):
+        """Cria o lote com a geometria e o estado atual de uma lista de Quadras"""
+        players = [p.type.lower() for p in quadras[0].players]
+        batch = cls([q.begin for q in quadras], [q.end for q in quadras], players)
+
+        for i, q in enumerate(quadras):
+            batch.ball_x[i] = q.ball.x
+            batch.ball_y[i] = q.ball.y
+            batch.ball_vx[i] = q.ball.vx
+            batch.ball_vy[i] = q.ball.vy
+            for s, p in enumerate(q.players):
+                batch.px[i, s] = p.x
+                batch.py[i, s] = p.y
+                batch.pvx[i, s] = p.vx
+                batch.pvy[i, s] = p.vy
+                batch.walking[i, s] = getattr(p, 'walking', 0)
+                batch.stuck_timer[i, s] = getattr(p, 'stuck_timer', 0)
+            batch.score[i] = q.score
+            batch.status[i] = q.status
+            batch.pontuou[i] = q.pontuou
+
+        for s in range(2):
+            if batch.players[s] == 'agent':
+                batch.set_brains(s, [q.players[s].brain for q in quadras])
+        return batch
+
+    def snapshot(self, idx=slice(None)):
+        """ArenaState das quadras idx agora (cópia: o lote pode seguir simulando)"""
+        rows = np.atleast_1d(self._rows[idx])
+        records = np.zeros(len(rows), dtype=STATE_DTYPE)
+        x0 = self.begin[rows, 0]
+        y0 = self.begin[rows, 1]
+        records['size'] = np.stack([self.largura[rows], self.altura[rows]], axis=1)
+        records['ball'] = np.stack([self.ball_x[rows] - x0, self.ball_y[rows] - y0,
+                                    self.ball_vx[rows], self.ball_vy[rows]], axis=1)
+        records['players'] = np.stack([self.px[rows] - x0[:, None], self.py[rows] - y0[:, None],
+                                       self.pvx[rows], self.pvy[rows]], axis=2)
+        records['walking'] = self.walking[rows]
+        records['stuck_timer'] = self.stuck_timer[rows]
+        records['score'] = self.score[rows]
+        records['status'] = self.status[rows]
+        records['pontuou'] = self.pontuou[rows]
+        records['last_scorer'] = self.last_scorer[rows]
+        rngs = None if self.rngs is None else [rng_state(self.rngs[r]) for r in rows]
+        return ArenaState(records, rngs)
+
+    def restore(self, state, idx=slice(None)):
+        """
+        Coloca as quadras idx no estado do snapshot (de uma quadra: copiado em todas).
+        Cada quadra ganha a sua cópia do sorteio do bot, então as cópias seguem iguais.
+        """
+        rows = np.atleast_1d(self._rows[idx])
+        records, rngs = state.expand(len(rows))
+        check_size(records, self.largura[rows], self.altura[rows])
+        x0 = self.begin[rows, 0]
+        y0 = self.begin[rows, 1]
+        self.ball_x[rows] = records['ball'][:, 0] + x0
+        self.ball_y[rows] = records['ball'][:, 1] + y0
+        self.ball_vx[rows] = records['ball'][:, 2]
+        self.ball_vy[rows] = records['ball'][:, 3]
+        self.px[rows] = records['players'][:, :, 0] + x0[:, None]
+        self.py[rows] = records['players'][:, :, 1] + y0[:, None]
+        self.pvx[rows] = records['players'][:, :, 2]
+        self.pvy[rows] = records['players'][:, :, 3]
+        self.walking[rows] = records['walking']
+        self.stuck_timer[rows] = records['stuck_timer']
+        self.actions[rows] = 0
+        self.score[rows] = records['score']
+        self.status[rows] = records['status']
+        self.pontuou[rows] = records['pontuou']
+        self.last_scorer[rows] = records['last_scorer']
+
+        if rngs is not None:
+            # Quadras fora de idx seguem com o sorteio que tinham (o módulo random, se nenhum)
+            self.rngs = [random] * self.n if self.rngs is None else list(self.rngs)
+            for r, rng in zip(rows, rngs):
+                self.rngs[r] = rng_from_state(rng)
+
+    def sync_to_quadras(self, quadras):
+        """Copia o estado do lote de volta para as Quadras (ex: para desenhar)"""
+        for i, q in enumerate(quadras):
+            self.sync_to_quadra(q, i)
+
+    def sync_to_quadra(self, q, i, scaled=False):
+        """
+        Copia o estado da quadra i do lote para a Quadra q.
+        scaled: mapeia a geometria da quadra i na de q (ex: uma Quadra ampliada só para desenhar)
+        """
+        if scaled:
+            sx = q.largura / self.largura[i]
+            sy = q.altura / self.altura[i]
+            ox = q.begin[0] - self.begin[i, 0] * sx
+            oy = q.begin[1] - self.begin[i, 1] * sy
+        else:
+            sx, sy, ox, oy = 1, 1, 0, 0
+
+        q.ball.x = self.ball_x[i] * sx + ox
+        q.ball.y = self.ball_y[i] * sy + oy
+        q.ball.vx = self.ball_vx[i] * sx
+        q.ball.vy = self.ball_vy[i] * sy
+        for s, p in enumerate(q.players):
+            p.x = self.px[i, s] * sx + ox
+            p.y = self.py[i, s] * sy + oy
+            p.vx = self.pvx[i, s] * sx
+            p.vy = self.pvy[i, s] * sy
+            if hasattr(p, 'walking'):
+                p.walking = self.walking[i, s]
+            if hasattr(p, 'stuck_timer'):
+                p.stuck_timer = int(self.stuck_timer[i, s])
+        q.score = [int(self.score[i, 0]), int(self.score[i, 1])]
+        q.status = int(self.status[i])
+        q.pontuou = bool(self.pontuou[i])
+
+    def set_brains(self, slot, brains):
+        """
+        Associa um cérebro por quadra ao slot 'agent' indicado: lista de RedeNeural
+        (empilhada aqui; chame de novo se mudarem) ou um RedeNeuralLote pronto.
+        """
+        if self.players[slot] != 'agent':
+            raise ValueError(f"Slot {slot} é '{self.players[slot]}', não 'agent'")
+        lote = brains if isinstance(brains, RedeNeuralLote) else RedeNeuralLote(list(brains))
+        if lote.size != self.n:
+            raise ValueError(f"Esperava {self.n} cérebros, recebeu {lote.size}")
+        if lote.input_size != self.features.size:
+            raise ValueError(f"Cérebros com {lote.input_size} entradas, as features {self.features.names} dão {self.features.size}")
+        self.lotes[slot] = lote
+
+    def observations(self, slot, idx=slice(None)):
+        """Inputs da rede para o slot (features de config.FEATURES), no buffer do slot"""
+        rows = self.n if isinstance(idx, slice) else len(idx)
+        return self.features.compute(BatchSource(self, slot, idx), self._obs[slot][:rows])
+
+    def step(self):
+        """Avança um tick em todas as quadras em andamento (status 0)"""
+        idx = np.flatnonzero(self.status == 0)
+        if idx.size == 0:
+            return
+        if idx.size == self.n:
+            idx = slice(None)
+
+        t = timers.start()
+        self._check_entities_collision(idx)
+        t = timers.lap('collision', t)
+        self._move_ball(idx)
+        t = timers.lap('ball', t)
+        for s in range(2):
+            if self.players[s] == 'agent':
+                ax, ay = self._agent_actions(s, idx)
+                t = timers.start()
+            else:
+                ax, ay = self._bot_actions(s, idx)
+            self.actions[idx, s, 0] = ax
+            self.actions[idx, s, 1] = ay
+            self._move_player(s, idx, ax, ay)
+            t = timers.lap('players', t)
+
+    # --- REGRAS (espelham Quadra / Ball / Agent / Bot) ---
+
+    def _check_entities_collision(self, idx):
+        px = self.px[idx]
+        py = self.py[idx]
+        pr = self.pr[idx]
+
+        dx = px[:, 0] - px[:, 1]
+        dy = py[:, 0] - py[:, 1]
+        dist = np.hypot(dx, dy)
+        min_dist = pr[:, 0] + pr[:, 1]
+
+        c = np.flatnonzero(dist < min_dist)
+        if c.size == 0:
+            return
+        rows = self._rows[idx][c]
+
+        d = dist[c]
+        d[d == 0] = 0.1
+        overlap = min_dist[c] - d
+        nx = dx[c] / d
+        ny = dy[c] / d
+
+        self.px[rows, 0] += nx * (overlap / 2)
+        self.py[rows, 0] += ny * (overlap / 2)
+        self.px[rows, 1] -= nx * (overlap / 2)
+        self.py[rows, 1] -= ny * (overlap / 2)
+
+        self.pvx[rows] *= PLAYER_COLLISION_DAMPING
+        self.pvy[rows] *= PLAYER_COLLISION_DAMPING
+
+    def _move_ball(self, idx):
+        rows = self._rows[idx]
+        r = self.ball_r[idx]
+        x0 = self.begin[idx, 0]
+        y0 = self.begin[idx, 1]
+        x1 = self.end[idx, 0]
+        y1 = self.end[idx, 1]
+
+        # 1. Velocidade e 2. fricção
+        bx = self.ball_x[idx] + self.ball_vx[idx]
+        by = self.ball_y[idx] + self.ball_vy[idx]
+        bvx = self.ball_vx[idx] * config.BALL_FRICTION
+        bvy = self.ball_vy[idx] * config.BALL_FRICTION
+        bvx[np.abs(bvx) < BALL_STOP_SPEED] = 0
+        bvy[np.abs(bvy) < BALL_STOP_SPEED] = 0
+
+        # 3a. Teto / chão
+        top = by - r < y0
+        bottom = ~top & (by + r > y1)
+        by = np.where(top, y0 + r, np.where(bottom, y1 - r, by))
+        bvy = np.where(top | bottom, bvy * BALL_BOUNCE, bvy)
+
+        # 3b. Paredes laterais, com passagem pelas traves (Goal.contains_ball)
+        left = bx - r < x0
+        right = ~left & (bx + r > x1)
+        tx = np.trunc(bx)
+        ty = np.trunc(by)
+        in_goal_y = (self.goal_top[idx] <= ty) & (ty < self.goal_top[idx] + self.goal_h[idx])
+        goal_left = left & in_goal_y & (self.goal_left_x[idx] <= tx) & (tx < self.goal_left_x[idx] + self.goal_w[idx])
+        goal_right = right & in_goal_y & (self.goal_right_x[idx] <= tx) & (tx < self.goal_right_x[idx] + self.goal_w[idx])
+
+        wall_left = left & ~goal_left
+        wall_right = right & ~goal_right
+        bx = np.where(wall_left, x0 + r, np.where(wall_right, x1 - r, bx))
+        bvx = np.where(wall_left | wall_right, bvx * BALL_BOUNCE, bvx)
+
+        self.ball_x[idx] = bx
+        self.ball_y[idx] = by
+        self.ball_vx[idx] = bvx
+        self.ball_vy[idx] = bvy
+
+        # Gol na trave esquerda => time da direita (1) pontua, e vice-versa
+        scored = np.flatnonzero(goal_left | goal_right)
+        if scored.size:
+            g = rows[scored]
+            self.score[g, 1] += goal_left[scored]
+            self.score[g, 0] += goal_right[scored]
+            self.last_scorer[g] = goal_left[scored]
+            self._on_goal(g)
+
+        # 3c. Colisão bola x jogador (um jogador por vez, como Ball._check_player_collision)
+        for s in range(2):
+            self._ball_player_collision(s, idx)
+
+    def _on_goal(self, g):
+        """Mesmo efeito de Quadra._on_goal para as quadras g"""
+        self.pontuou[g] = True
+        win_left = self.score[g, 0] >= config.WIN_SCORE
+        win_right = ~win_left & (self.score[g, 1] >= config.WIN_SCORE)
+        self.status[g[win_left]] = 1
+        self.status[g[win_right]] = 2
+
+        # Bola e jogadores voltam para a saída
+        self.ball_x[g] = self.center_x[g]
+        self.ball_y[g] = self.center_y[g]
+        self.ball_vx[g] = 0
+        self.ball_vy[g] = 0
+        self.px[g] = self.start_x[g]
+        self.py[g] = self.center_y[g, None]
+        self.pvx[g] = 0
+        self.pvy[g] = 0
+
+    def _ball_player_collision(self, s, idx):
+        dx = self.ball_x[idx] - self.px[idx, s]
+        dy = self.ball_y[idx] - self.py[idx, s]
+        distance = np.hypot(dx, dy)
+        min_distance = self.ball_r[idx] + self.pr[idx, s]
+
+        c = np.flatnonzero(distance < min_distance)
+        if c.size == 0:
+            return
+        rows = self._rows[idx][c]
+
+        # Direção da colisão (cos/sin de atan2(dy, dx)); distância 0 => ângulo 0
+        d = distance[c]
+        zero = d == 0
+        d[zero] = 0.1
+        cos_a = np.where(zero, 1.0, dx[c] / d)
+        sin_a = np.where(zero, 0.0, dy[c] / d)
+
+        # Correção de posição
+        overlap = min_distance[c] - d
+        self.ball_x[rows] += cos_a * (overlap + 0.5)
+        self.ball_y[rows] += sin_a * (overlap + 0.5)
+
+        # Transferência de energia
+        player_speed = np.hypot(self.pvx[rows, s], self.pvy[rows, s])
+        total_force = KICK_POWER + player_speed * KICK_PLAYER_FACTOR
+        bvx = self.ball_vx[rows] + cos_a * total_force
+        bvy = self.ball_vy[rows] + sin_a * total_force
+
+        # Limite de velocidade da bola
+        current_speed = np.hypot(bvx, bvy)
+        fast = current_speed > MAX_BALL_SPEED
+        scale = np.where(fast, MAX_BALL_SPEED / np.where(fast, current_speed, 1), 1)
+        self.ball_vx[rows] = np.where(fast, bvx * scale, bvx)
+        self.ball_vy[rows] = np.where(fast, bvy * scale, bvy)
+
+    def _agent_actions(self, s, idx):
+        lote = self.lotes[s]
+        if lote is None:
+            raise RuntimeError(f"Slot {s} é 'agent' mas não tem cérebros (use set_brains)")
+
+        # Uma única inferência para todas as quadras em andamento
+        t = timers.start()
+        obs = self.observations(s, idx)
+        t = timers.lap('observe', t)
+        actions = lote.feedForward(obs, None if isinstance(idx, slice) else idx)
+        timers.lap('infer', t)
+        return actions[:, 0], actions[:, 1]
+
+    def _bot_actions(self, s, idx):
+        x = self.px[idx, s]
+        y = self.py[idx, s]
+        r = self.pr[idx, s]
+        bx = self.ball_x[idx]
+        by = self.ball_y[idx]
+
+        # --- ESTRATÉGIA (Bot.update) ---
+        direction_sign = 1 if s == 0 else -1
+        offset_dist = r * 2.5
+        ideal_x = bx - (offset_dist * direction_sign)
+        ideal_y = by
+
+        is_ball_behind = (bx < x) if s == 0 else (bx > x)
+        dist_to_ideal = np.hypot(x - ideal_x, y - ideal_y)
+
+        go_ball = (dist_to_ideal < r) | (~is_ball_behind & (np.abs(y - by) < r))
+        near_top = by < self.begin[idx, 1] + r * 3
+        near_bottom = by > self.end[idx, 1] - r * 3
+        target_x = np.where(go_ball, bx, ideal_x)
+        target_y = np.where(go_ball, by, np.where(near_top, by + r * 2, np.where(near_bottom, by - r * 2, ideal_y)))
+
+        # --- CORREÇÃO DE "BOT PARADÃO" ---
+        current_speed = np.hypot(self.pvx[idx, s], self.pvy[idx, s])
+        dist_to_ball = np.hypot(x - bx, y - by)
+        stuck = (current_speed < 0.5) & (dist_to_ball > r + 5)
+        timer = np.where(stuck, self.stuck_timer[idx, s] + 1, 0)
+        self.stuck_timer[idx, s] = timer
+
+        forced = np.flatnonzero(timer > BOT_STUCK_FRAMES)
+        if forced.size:
+            target_x[forced] = bx[forced]
+            target_y[forced] = by[forced]
+            # Jitter aleatório, na mesma ordem de sorteio do Bot
+            rows = self._rows[idx]
+            for k in forced:
+                rng = random if self.rngs is None else self.rngs[rows[k]]
+                target_x[k] += rng.randint(-BOT_JITTER, BOT_JITTER)
+                target_y[k] += rng.randint(-BOT_JITTER, BOT_JITTER)
+
+        ax = np.where(x < target_x - 1, 1, np.where(x > target_x + 1, -1, 0))
+        ay = np.where(y < target_y - 1, 1, np.where(y > target_y + 1, -1, 0))
+        return ax, ay
+
+    def _move_player(self, s, idx, ax, ay):
+        r = self.pr[idx, s]
+        max_speed = self.speed[idx, s]
+
+        # Aceleração + fricção
+        vx = (self.pvx[idx, s] + ax * ACCELERATION) * FRICTION
+        vy = (self.pvy[idx, s] + ay * ACCELERATION) * FRICTION
+
+        # Velocidade máxima
+        current_speed = np.hypot(vx, vy)
+        fast = current_speed > max_speed
+        scale = max_speed / np.where(fast, current_speed, 1)
+        vx = np.where(fast, vx * scale, vx)
+        vy = np.where(fast, vy * scale, vy)
+
+        old_x = self.px[idx, s].copy()
+        old_y = self.py[idx, s].copy()
+        x = old_x + vx
+        y = old_y + vy
+
+        # Paredes (rebote amortecido)
+        x0 = self.begin[idx, 0]
+        y0 = self.begin[idx, 1]
+        x1 = self.end[idx, 0]
+        y1 = self.end[idx, 1]
+
+        hit_right = x + r > x1
+        hit_left = ~hit_right & (x - r < x0)
+        x = np.where(hit_right, x1 - r, np.where(hit_left, x0 + r, x))
+        vx = np.where(hit_right | hit_left, vx * PLAYER_BOUNCE, vx)
+
+        hit_bottom = y + r > y1
+        hit_top = ~hit_bottom & (y - r < y0)
+        y = np.where(hit_bottom, y1 - r, np.where(hit_top, y0 + r, y))
+        vy = np.where(hit_bottom | hit_top, vy * PLAYER_BOUNCE, vy)
+
+        self.px[idx, s] = x
+        self.py[idx, s] = y
+        self.pvx[idx, s] = vx
+        self.pvy[idx, s] = vy
+        self.walking[idx, s] = np.abs(old_x - x) + np.abs(old_y - y)
@@ -0,0 +1,83 @@
+import random
+import numpy as np
+
+# ========================
+# SNAPSHOT DO ESTADO DAS QUADRAS
+# ========================
+# Tudo que muda durante uma partida (bola, jogadores, placar, status, stuck_timer do bot)
+# em um registro fixo por quadra, mais o estado do random.Random do bot. Serve para
+# ArenaBatch e Quadra: tira-se um snapshot de uma situação (ex: a saída depois de um gol,
+# a bola na boca do gol) e ela é restaurada ou copiada em outras quadras, para avaliar
+# vários cérebros a partir dela sem simular de novo o começo da partida.
+#
+#   state = batch.snapshot([i])      # quadra i agora (ex: dentro de um on_tick)
+#   run_matches(mode, brains, ticks, begin, end, seeds, start=state)   # todas partem dela
+#   q.restore(state)                 # ou numa Quadra do mesmo tamanho
+#
+# Posições ficam relativas ao canto da quadra (begin): o estado vale para qualquer
+# quadra do mesmo tamanho, em qualquer lugar da tela.
+
+STATE_DTYPE = np.dtype([
+    ('size', '<f8', (2,)),           # largura, altura da quadra de origem
+    ('ball', '<f8', (4,)),           # x, y (relativos a begin), vx, vy
+    ('players', '<f8', (2, 4)),      # por slot: x, y (relativos a begin), vx, vy
+    ('walking', '<f8', (2,)),
+    ('stuck_timer', '<i8', (2,)),
+    ('score', '<i8', (2,)),
+    ('status', 'i1'),
+    ('pontuou', '?'),
+    ('last_scorer', 'i1'),           # -1 => nenhum gol ainda
+])
+
+
+def rng_state(rng):
+    """Estado de um random.Random (None para o módulo random, que é global e não é copiado)"""
+    return None if rng is None or rng is random else rng.getstate()
+
+
+def rng_from_state(state):
+    """random.Random novo a partir de rng_state (None => módulo random)"""
+    if state is None:
+        return random
+    rng = random.Random()
+    rng.setstate(state)
+    return rng
+
+
+class ArenaState:
+    def __init__(self, records, rngs=None):
+        """
+        records: array STATE_DTYPE, um registro por quadra
+        rngs: estado do sorteio do bot de cada quadra (rng_state), ou None se não há
+        """
+        self.records = np.atleast_1d(records)
+        self.rngs = None if rngs is None else list(rngs)
+
+    def __len__(self):
+        return len(self.records)
+
+    def select(self, idx):
+        """ArenaState só com as quadras idx (na ordem dada)"""
+        idx = np.atleast_1d(np.arange(len(self))[idx])
+        rngs = None if self.rngs is None else [self.rngs[i] for i in idx]
+        return ArenaState(self.records[idx].copy(), rngs)
+
+    def expand(self, n):
+        """
+        (registros, rngs) para n quadras: um snapshot de uma quadra é copiado em todas,
+        um de n quadras vai quadra a quadra
+        """
+        if len(self) == n:
+            return self.records, self.rngs
+        if len(self) != 1:
+            raise ValueError(f"Snapshot de {len(self)} quadras não serve para {n} quadras")
+        return np.repeat(self.records, n), None if self.rngs is None else self.rngs * n
+
+
+def check_size(records, largura, altura):
+    """ValueError se as quadras de origem dos registros não têm o tamanho das de destino"""
+    # Em outro tamanho a física mudaria (velocidades e raios não escalam com a quadra)
+    same = (records['size'][:, 0] == largura) & (records['size'][:, 1] == altura)
+    if not np.all(same):
+        w, h = records['size'][int(np.argmin(same))]
+        raise ValueError(f"Snapshot de uma quadra {w:g}x{h:g} não serve para uma quadra de outro tamanho")
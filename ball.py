@@ -1,4 +1,3 @@
-import pygame
 from entity import Entity
 import math
 import config
@@ -23,8 +22,6 @@ class Ball(Entity):
         # Vetores de velocidade (Física real)
         self.vx = 0
         self.vy = 0
-        
-        self.rect = pygame.Rect(int(self.x - self.radius), int(self.y - self.radius), int(self.radius * 2), int(self.radius * 2))
 
         # Lista de goals (será atribuída pela Quadra se existir)
         self.goals = []
@@ -133,6 +130,5 @@ class Ball(Entity):
                     self.vy *= scale
 
     def update(self):
+        # Só física: o desenho é um passo separado (Quadra.render)
         self.movimentacao()
-        self.rect.center = (int(self.x), int(self.y))
-        self.draw()
\ No newline at end of file
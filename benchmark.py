@@ -0,0 +1,340 @@
+import sys
+
+# Benchmark é sempre headless: nada de janela (nem pygame) nos módulos importados
+if "--headless" not in sys.argv:
+    sys.argv.append("--headless")
+
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import timeit
+from datetime import datetime
+
+import numpy as np
+
+import config
+from quadra import Quadra
+from redeneural import RedeNeural
+from populacao import Populacao
+from evaluator import MatchEvaluator, MODES, arena_geometry
+from perf import timers, PHASES
+from seeds import SeedStreams, NETWORK
+import agent_vs_bot
+import train_agent
+import train_agent_robust
+import train_agent_segregated
+
+# ========================
+# BENCHMARK (HEADLESS)
+# ========================
+# Mede a velocidade da simulação, da rede e da evolução com sementes fixas e grava
+# um JSON para comparar execuções (ex: antes/depois de mexer na física ou na rede).
+#
+#   python benchmark.py [--arenas=50,200] [--hidden=24x8,64x32] [--ticks=600]
+#                       [--repeat=5] [--seed=0] [--only=quadra,arena_batch,...]
+#                       [--out=arquivo.json] [--compare=anterior.json]
+#
+# Métricas terminadas em _per_s / _per_hour: maior é melhor; _us / _ms / _s: menor é melhor.
+
+BENCH_DIR = "benchmarks"
+SECTIONS = ['quadra', 'arena_batch', 'feedforward', 'mutate', 'generation']
+# Quanto uma métrica pode piorar (fração) antes do --compare marcar regressão
+REGRESSION_TOLERANCE = 0.10
+
+# Modo de treino -> (treinador, populações, indivíduos por quadra em cada população)
+TRAINERS = {
+    'vs_bot': (agent_vs_bot, 1, 1),
+    'segregated': (train_agent_segregated, 2, 1),
+    'robust': (train_agent_robust, 2, 1),
+    'agent': (train_agent, 1, 2),
+}
+
+
+def _parse_list(value, parse):
+    return [parse(item) for item in value.split(",") if item]
+
+
+def _parse_shape(text):
+    # "24x8" -> [24, 8]
+    return [int(size) for size in text.split("x")]
+
+
+def _seed_all(seed):
+    # Só o random dos bots: pesos e entradas saem de SeedStreams(seed)
+    random.seed(seed)
+
+
+def _per_call(fn, number, repeat):
+    """(mediana, mínimo) do tempo por chamada, em segundos"""
+    per = np.array(timeit.repeat(fn, number=number, repeat=repeat)) / number
+    return float(np.median(per)), float(per.min())
+
+
+def bench_quadra(arenas, hidden, ticks, seed):
+    """Ticks/s e decisões de agente/s stepando Quadras headless (uma a uma, em Python)"""
+    results = []
+    for players in (['agent', 'bot'], ['agent', 'agent']):
+        _seed_all(seed)
+        rng = SeedStreams(seed).generator(NETWORK)
+        begin, end = arena_geometry(arenas)
+        quadras = [Quadra(None, tuple(begin[i]), tuple(end[i]), players) for i in range(arenas)]
+        for q in quadras:
+            for p in q.players:
+                if p.type == "AGENT":
+                    p.brain = RedeNeural(config.INPUT_SIZE_LAYER, hidden, rng=rng)
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            for q in quadras:
+                q.step()
+        elapsed = time.perf_counter() - start
+
+        agents = players.count('agent')
+        results.append({
+            'name': f"quadra.{players[0]}_vs_{players[1]}",
+            'seconds_s': elapsed,
+            'ticks_per_s': ticks / elapsed,
+            'arena_ticks_per_s': ticks * arenas / elapsed,
+            'decisions_per_s': ticks * arenas * agents / elapsed,
+        })
+    return results
+
+
+def bench_arena_batch(arenas, hidden, ticks, seed):
+    """Mesma medida no ArenaBatch (todas as quadras por tick, inferência em lote)"""
+    from arena_batch import ArenaBatch
+
+    results = []
+    for players in (['agent', 'bot'], ['agent', 'agent']):
+        _seed_all(seed)
+        streams = SeedStreams(seed)
+        begin, end = arena_geometry(arenas)
+        batch = ArenaBatch(begin, end, players)
+        for s in range(2):
+            if players[s] == 'agent':
+                batch.set_brains(s, Populacao(arenas, hidden_size=hidden, rng=streams.population(s)).lote())
+        batch.rngs = [random.Random(seed + i) for i in range(arenas)]
+
+        start = time.perf_counter()
+        for _ in range(ticks):
+            batch.step()
+        elapsed = time.perf_counter() - start
+
+        agents = players.count('agent')
+        results.append({
+            'name': f"arena_batch.{players[0]}_vs_{players[1]}",
+            'seconds_s': elapsed,
+            'ticks_per_s': ticks / elapsed,
+            'arena_ticks_per_s': ticks * arenas / elapsed,
+            'decisions_per_s': ticks * arenas * agents / elapsed,
+        })
+    return results
+
+
+def bench_feedforward(arenas, hidden, repeat, seed):
+    """Latência de uma decisão (RedeNeural) e de um tick de decisões em lote (RedeNeuralLote)"""
+    streams = SeedStreams(seed)
+    rng = streams.generator(NETWORK)
+    brain = RedeNeural(config.INPUT_SIZE_LAYER, hidden, rng=rng)
+    inputs = rng.random(config.INPUT_SIZE_LAYER)
+    median, best = _per_call(lambda: brain.feedForward(inputs), 2000, repeat)
+
+    lote = Populacao(arenas, hidden_size=hidden, rng=streams.population(0)).lote()
+    batch_inputs = rng.random((arenas, config.INPUT_SIZE_LAYER))
+    batch_median, batch_best = _per_call(lambda: lote.feedForward(batch_inputs), 200, repeat)
+
+    return [
+        {'name': "feedforward.rede", 'latency_us': median * 1e6, 'latency_min_us': best * 1e6},
+        {'name': "feedforward.lote", 'latency_us': batch_median * 1e6, 'latency_min_us': batch_best * 1e6,
+         'per_decision_us': batch_median * 1e6 / arenas},
+    ]
+
+
+def bench_mutate(arenas, hidden, repeat, seed):
+    """Custo de mutate/copy de uma RedeNeural e de uma evolução da Populacao inteira"""
+    streams = SeedStreams(seed)
+    brain = RedeNeural(config.INPUT_SIZE_LAYER, hidden, rng=streams.generator(NETWORK))
+    mutate_rng = streams.evolution(0, 1)
+    mutate_median, mutate_best = _per_call(lambda: brain.mutate(0.15, 0.25, rng=mutate_rng), 1000, repeat)
+    copy_median, copy_best = _per_call(brain.copy, 1000, repeat)
+
+    pop = Populacao(arenas * 2, hidden_size=hidden, rng=streams.population(0))
+    evolve_rng = streams.evolution(1, 1)
+    def evolve():
+        pop.fitness[:] = evolve_rng.random(pop.size)
+        pop.evolve(0.1, 0.15, 0.25, rng=evolve_rng)
+    evolve_median, evolve_best = _per_call(evolve, 10, repeat)
+
+    return [
+        {'name': "mutate.rede", 'latency_us': mutate_median * 1e6, 'latency_min_us': mutate_best * 1e6},
+        {'name': "copy.rede", 'latency_us': copy_median * 1e6, 'latency_min_us': copy_best * 1e6},
+        {'name': "evolve.populacao", 'population': pop.size, 'genome_size': pop.genome_size,
+         'latency_ms': evolve_median * 1e3, 'latency_min_ms': evolve_best * 1e3},
+    ]
+
+
+def bench_generation(mode, arenas, hidden, ticks, seed):
+    """
+    Uma geração completa como no treinador do modo (rodadas, pareamentos, evolução),
+    com as partidas no MatchEvaluator (respeita --workers). ticks=None => duração do treinador.
+    """
+    trainer, n_pops, per_arena = TRAINERS[mode]
+    rounds = getattr(trainer, 'MATCHES_PER_AGENT', 1)
+    ticks = ticks or getattr(trainer, 'TICKS_PER_MATCH', None) or trainer.TICKS_PER_GENERATION
+    rate = getattr(trainer, 'MUTATION_RATE', None) or trainer.MUT_RATE_EXPLORE
+    scale = getattr(trainer, 'MUTATION_SCALE', None) or trainer.MUT_SCALE_EXPLORE
+
+    # Mesmos streams de sorteio dos treinadores (geração 1)
+    streams = SeedStreams(seed)
+    pops = [Populacao(arenas * per_arena, hidden_size=hidden, rng=streams.population(k)) for k in range(n_pops)]
+    evaluator = MatchEvaluator(mode, config.WORKERS)
+
+    timers.reset()
+    start = time.perf_counter()
+    orders, matches = [], []
+    for match_round in range(1, rounds + 1):
+        order = [list(range(arenas)) for _ in pops]
+        if rounds > 1 and n_pops > 1:
+            order[1] = streams.pairing(1, match_round).permutation(arenas).tolist()
+        brains = [pop.lote(idx) for pop, idx in zip(pops, order)]
+        if MODES[mode][0][1] == 'bot':
+            brains.append(None)
+        orders.append(order)
+        matches.append((brains, streams.match_seeds(1, match_round, arenas)))
+    # Como nos treinadores headless: vários rounds vão numa fila só (run_rounds), um round roda direto
+    if rounds > 1:
+        results = evaluator.run_rounds(matches, ticks)
+    else:
+        results = [evaluator.run(brains, ticks, seeds) for brains, seeds in matches]
+    for order, (fitness, _, _) in zip(orders, results):
+        for s, (pop, idx) in enumerate(zip(pops, order)):
+            pop.fitness[idx] += fitness[:, s]
+    for k, pop in enumerate(pops):
+        pop.evolve(trainer.ELITISM_PERCENT, rate, scale, streams.evolution(k, 1))
+    elapsed = time.perf_counter() - start
+    evaluator.close()
+    phases = timers.summary()
+
+    return [{
+        'name': f"generation.{mode}",
+        'rounds': rounds,
+        'match_ticks': ticks,
+        'seconds_s': elapsed,
+        'generations_per_hour': 3600 / elapsed,
+        'arena_ticks_per_s': rounds * ticks * arenas / elapsed,
+        # Tempo por fase (perf.timers), para ver o que mudou quando a geração fica lenta
+        'phases_s': {phase: phases[phase]['total_s'] for phase in PHASES if phase in phases},
+    }]
+
+
+def run(arena_counts, shapes, ticks, repeat, seed, sections):
+    results = []
+    for arenas in arena_counts:
+        for hidden in shapes:
+            print(f"--- {arenas} quadras | ocultas {hidden} ---")
+            found = []
+            if 'quadra' in sections:
+                found += bench_quadra(arenas, hidden, ticks or config.TICKS_PER_SECOND * 10, seed)
+            if 'arena_batch' in sections:
+                found += bench_arena_batch(arenas, hidden, ticks or config.TICKS_PER_SECOND * 10, seed)
+            if 'feedforward' in sections:
+                found += bench_feedforward(arenas, hidden, repeat, seed)
+            if 'mutate' in sections:
+                found += bench_mutate(arenas, hidden, repeat, seed)
+            if 'generation' in sections:
+                for mode in TRAINERS:
+                    found += bench_generation(mode, arenas, hidden, ticks, seed)
+
+            for result in found:
+                result.update(arenas=arenas, hidden=list(hidden))
+                print(f"{result['name']:<28} " + " | ".join(
+                    f"{k}={v:.4g}" for k, v in result.items() if isinstance(v, float)))
+            results += found
+    return results
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _higher_is_better(metric):
+    return metric.endswith("_per_s") or metric.endswith("_per_hour")
+
+
+def compare(previous, current, tolerance=REGRESSION_TOLERANCE):
+    """Imprime a razão atual/anterior de cada métrica e retorna as regressões [(nome, métrica, razão)]"""
+    def key(result):
+        return (result['name'], result['arenas'], tuple(result['hidden']))
+
+    before = {key(r): r for r in previous['results']}
+    regressions = []
+    for result in current['results']:
+        old = before.get(key(result))
+        if old is None:
+            continue
+        for metric, value in result.items():
+            if not isinstance(value, float) or not isinstance(old.get(metric), float) or old[metric] <= 0:
+                continue
+            ratio = value / old[metric]
+            worse = ratio < 1 - tolerance if _higher_is_better(metric) else ratio > 1 + tolerance
+            mark = "  <-- REGRESSÃO" if worse else ""
+            print(f"{result['name']:<28} {metric:<20} {old[metric]:>12.4g} -> {value:<12.4g} x{ratio:.2f}{mark}")
+            if worse:
+                regressions.append((result['name'], metric, ratio))
+    return regressions
+
+
+def main():
+    arena_counts = _parse_list(config._arg_value("arenas", str(config.ROWS * config.COLUMNS)), int)
+    shapes = _parse_list(config._arg_value("hidden", "x".join(map(str, config.HIDDEN_SIZE_LAYER))), _parse_shape)
+    ticks = config._arg_value("ticks", None)
+    ticks = int(ticks) if ticks is not None else None
+    repeat = int(config._arg_value("repeat", 5))
+    seed = config.SEED if config.SEED is not None else 0
+    sections = _parse_list(config._arg_value("only", ",".join(SECTIONS)), str)
+    for section in sections:
+        if section not in SECTIONS:
+            raise ValueError(f"Seção desconhecida: '{section}' (opções: {', '.join(SECTIONS)})")
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'workers': config.WORKERS,
+            'seed': seed,
+            'ticks': ticks,
+            'repeat': repeat,
+        },
+        'results': run(arena_counts, shapes, ticks, repeat, seed, sections),
+    }
+
+    out_path = config._arg_value("out", None)
+    if out_path is None:
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        out_path = os.path.join(BENCH_DIR, f"bench_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}.json")
+    with open(out_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Resultados salvos: {out_path}")
+
+    compare_path = config._arg_value("compare", None)
+    if compare_path is not None:
+        with open(compare_path) as f:
+            regressions = compare(json.load(f), report)
+        if regressions:
+            print(f"⚠️ {len(regressions)} métrica(s) pioraram mais de {REGRESSION_TOLERANCE:.0%}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,10 @@
 from entity import Entity
 import config
-import pygame
 import math
 import random # Importante para dar uma variada se travar muito
 
 class Bot(Entity):
-    def __init__(self, ID, begin, end, team, screen, color=config.BOT_COLOR, target=None):
+    def __init__(self, ID, begin, end, team, screen, color=config.BOT_COLOR, target=None, rng=random):
         largura = end[0] - begin[0]
         altura = end[1] - begin[1]
         self.ID = ID
@@ -22,6 +21,8 @@ class Bot(Entity):
         
         self.target = target 
         self.team = team 
+        # Sorteio do jitter quando trava (random.Random por quadra deixa a partida reprodutível)
+        self.rng = rng
         
         self.attack_goal_x = end[0] if team == 0 else begin[0]
 
@@ -34,8 +35,6 @@ class Bot(Entity):
         # --- NOVIDADE: Timer para detectar se travou ---
         self.stuck_timer = 0 
 
-        self.rect = pygame.Rect(int(self.x - self.radius), int(self.y - self.radius), int(self.radius * 2), int(self.radius * 2))
-
     def update(self):
         if self.target is None:
             return
@@ -89,8 +88,8 @@ class Bot(Entity):
             target_x, target_y = bx, by
             
             # Adiciona um pequeno "jitter" aleatório para sair de alinhamentos perfeitos na parede
-            target_x += random.randint(-10, 10)
-            target_y += random.randint(-10, 10)
+            target_x += self.rng.randint(-10, 10)
+            target_y += self.rng.randint(-10, 10)
 
         # --- MOVIMENTAÇÃO COM FÍSICA ---
         
@@ -136,6 +135,3 @@ class Bot(Entity):
         elif self.y - self.radius < self.begin[1]:
             self.y = self.begin[1] + self.radius
             self.vy *= -0.5
-        
-        self.rect.center = (int(self.x), int(self.y))
-        self.draw()
\ No newline at end of file
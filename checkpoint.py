@@ -0,0 +1,108 @@
+import json
+import os
+import random
+import numpy as np
+
+import config
+
+# ========================
+# CHECKPOINT DO TREINO
+# ========================
+# Um diretório por treinador (checkpoints/<nome>/) com:
+#   state.npz   -> geração, populações (genomas, fitness, RNG), contadores, semente dos
+#                  streams (SeedStreams) e RNGs globais.
+#                  Reescrito a cada checkpoint: grava em .tmp e troca com os.replace (atômico).
+#   history.f64 -> melhor fitness de cada geração, float64 cru, só cresce (append).
+
+STATE_FILE = "state.npz"
+HISTORY_FILE = "history.f64"
+
+
+class Checkpoint:
+    def __init__(self, name, directory=config.CHECKPOINT_DIR):
+        self.dir = os.path.join(directory, name)
+        self.state_path = os.path.join(self.dir, STATE_FILE)
+        self.history_path = os.path.join(self.dir, HISTORY_FILE)
+
+    def exists(self):
+        return os.path.exists(self.state_path)
+
+    def reset(self):
+        """Treino novo: apaga o estado e o histórico anteriores (um --resume antes do primeiro save não acha o treino velho)"""
+        for path in (self.state_path, self.history_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def append_history(self, best_fitness):
+        """Acrescenta o melhor fitness da geração ao histórico (8 bytes por geração)"""
+        os.makedirs(self.dir, exist_ok=True)
+        with open(self.history_path, 'ab') as f:
+            f.write(np.float64(best_fitness).tobytes())
+
+    def save(self, generation, populations, counters=None, streams=None):
+        """
+        Salva o estado para recomeçar na geração `generation`.
+        populations: {nome: Populacao}; counters: {nome: int} (ex: gols da fase)
+        streams: SeedStreams do treino (a semente volta no load e os sorteios seguem iguais)
+        """
+        os.makedirs(self.dir, exist_ok=True)
+
+        arrays = {
+            'generation': np.int64(generation),
+            'counters': np.array(json.dumps(counters or {})),
+            'py_random': np.array(json.dumps(random.getstate())),
+        }
+        if streams is not None:
+            arrays['seed_entropy'] = np.array(str(streams.entropy))
+        _, keys, pos, has_gauss, cached_gaussian = np.random.get_state()
+        arrays['np_random_keys'] = keys
+        arrays['np_random_extra'] = np.array([pos, has_gauss, cached_gaussian], dtype=np.float64)
+
+        for name, pop in populations.items():
+            arrays[f'{name}.genomes'] = pop.genomes
+            arrays[f'{name}.fitness'] = pop.fitness
+            arrays[f'{name}.rng'] = np.array(json.dumps(pop.rng.bit_generator.state))
+
+        # Grava ao lado e troca de uma vez: um crash no meio nunca deixa um state.npz pela metade
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.state_path)
+
+    def load(self, populations, streams=None):
+        """
+        Restaura as populações (já criadas, mesmo tamanho), os RNGs globais e a semente de streams.
+        Retorna (generation, counters, history).
+        """
+        with np.load(self.state_path) as data:
+            generation = int(data['generation'])
+            counters = json.loads(str(data['counters']))
+
+            version, state, gauss_next = json.loads(str(data['py_random']))
+            random.setstate((version, tuple(state), gauss_next))
+            pos, has_gauss, cached_gaussian = data['np_random_extra']
+            np.random.set_state(('MT19937', data['np_random_keys'], int(pos), int(has_gauss), float(cached_gaussian)))
+            if streams is not None and 'seed_entropy' in data:
+                streams.entropy = int(str(data['seed_entropy']))
+
+            for name, pop in populations.items():
+                genomes = data[f'{name}.genomes']
+                if genomes.shape != pop.genomes.shape:
+                    raise ValueError(f"Checkpoint '{name}' tem genomas {genomes.shape}, a população é {pop.genomes.shape}")
+                pop.genomes[...] = genomes
+                pop.fitness[...] = data[f'{name}.fitness']
+                pop.rng.bit_generator.state = json.loads(str(data[f'{name}.rng']))
+
+        return generation, counters, self._load_history(generation - 1)
+
+    def _load_history(self, length):
+        # Descarta o que passou do checkpoint (ex: crash depois do append) e bytes de escrita incompleta
+        if not os.path.exists(self.history_path):
+            return []
+        with open(self.history_path, 'r+b') as f:
+            data = f.read(length * 8)
+            length = len(data) // 8
+            f.truncate(length * 8)
+        return np.frombuffer(data[:length * 8], dtype=np.float64).tolist()
@@ -3,16 +3,18 @@
 # ========================
 
 import random
+import sys
 
 
-def Variate_grass_color():
+def Variate_grass_color(rng=random):
+    # rng: random.Random dos sorteios (padrão: o módulo random)
     # Grande variação, afeta Vermelho e Azul
-    variate_R_B = random.randint(-40, 40)
+    variate_R_B = rng.randint(-40, 40)
     # Pequena variação, afeta o Verde
-    variate_G = random.randint(-15, 15)
+    variate_G = rng.randint(-15, 15)
     
     # 1. Escolhe um "temperamento" de cor principal para a quadra
-    color_type = random.choice(['GREEN', 'YELLOW'])
+    color_type = rng.choice(['GREEN', 'YELLOW'])
     
     if color_type == 'GREEN':
         # Tons de grama viva: G alto, R e B baixos
@@ -38,6 +40,55 @@ def Variate_grass_color():
     
     return (final_R, final_G, final_B)
 
+# MODO HEADLESS
+# Simula sem janela, sem Surface e sem importar pygame (ex: python train_agent_robust.py --headless)
+HEADLESS = "--headless" in sys.argv
+# Duração das partidas é contada em ticks de física (60 ticks = 1s de jogo), nunca em relógio de parede
+TICKS_PER_SECOND = 60
+# MODO TURBO: janela sem limite de 60 FPS, simula o mais rápido que a CPU permitir (tecla T alterna)
+TURBO = "--turbo" in sys.argv
+
+
+def _arg_value(name, default):
+    # Lê opções no formato --nome=valor da linha de comando
+    for arg in sys.argv:
+        if arg.startswith(f"--{name}="):
+            return arg.split("=", 1)[1]
+    return default
+
+# AVALIAÇÃO PARALELA: processos que dividem as partidas da geração (ex: --workers=8, só em headless)
+WORKERS = int(_arg_value("workers", 1))
+# COMPACTAÇÃO: com as partidas em andamento em até essa fração do lote, as encerradas saem
+# dele e o tick só paga pelas vivas (0 desliga)
+COMPACT_RATIO = 0.5
+# SEMENTE do treino (ex: --seed=42): mesma semente => mesmo resultado, com qualquer número de workers
+SEED = _arg_value("seed", None)
+SEED = int(SEED) if SEED is not None else None
+
+# CHECKPOINT: estado completo do treino a cada N gerações; --resume continua de onde parou
+CHECKPOINT_DIR = "checkpoints"
+CHECKPOINT_EVERY = int(_arg_value("checkpoint-every", 1))
+RESUME = "--resume" in sys.argv
+
+# REPLAY: grava as N melhores partidas da rodada a cada K gerações (ex: --record=3 --record-every=10)
+# em REPLAY_DIR; veja com python replay.py arquivo.replay
+REPLAY_DIR = "replays"
+RECORD_BEST = int(_arg_value("record", 0))
+RECORD_EVERY = int(_arg_value("record-every", 10))
+RECORD_FLUSH_TICKS = 60  # ticks juntados na memória antes de cada escrita
+
+# ESPECTADOR: ticks de simulação por frame desenhado (ex: --ticks-per-frame=8) ou "auto":
+# desenha a RENDER_FPS e simula o máximo possível entre um frame e outro.
+# Na janela: +/- dobram/dividem os ticks por frame, A liga/desliga o automático
+_ticks_per_frame = _arg_value("ticks-per-frame", "1")
+AUTO_TICKS_PER_FRAME = _ticks_per_frame == "auto"
+TICKS_PER_FRAME = 1 if AUTO_TICKS_PER_FRAME else int(_ticks_per_frame)
+RENDER_FPS = 60
+MAX_TICKS_PER_FRAME = 1024
+
+# TIMERS por fase (física, rede, recompensas, desenho, GA) com resumo a cada geração; --no-timers desliga
+TIMERS = "--no-timers" not in sys.argv
+
 # JANELA
 GAME_WIDTH = 1000   # Antigo WINDOW_WIDTH
 GAME_HEIGHT = 1000  # Antigo WINDOW_HEIGHT
@@ -54,10 +105,23 @@ NODE_ON_COLOR = (0, 255, 0)
 WEIGHT_POS_COLOR = (0, 200, 0) # Peso positivo (verde)
 WEIGHT_NEG_COLOR = (200, 0, 0) # Peso negativo (vermelho)
 
+# ARENA CANÔNICA: toda partida simulada usa este sistema de coordenadas (unidades de física),
+# não importa o tamanho da janela nem quantas quadras existem. A tela só transforma na hora
+# de desenhar. 200x100 é o tamanho da célula da grade padrão (dinâmica igual à de antes)
+ARENA_WIDTH = 200
+ARENA_HEIGHT = 100
+
 # Quantidade de Quadras
 limiar = 5
 ROWS = 2*limiar
 COLUMNS = limiar
+# Partidas simultâneas por rodada (ex: --quadras=500). A grade da tela mostra só ROWS*COLUMNS;
+# o modo foco mostra qualquer uma
+QUADRAS = int(_arg_value("quadras", ROWS * COLUMNS))
+# MODO FOCO: desenha só a quadra do líder, ampliada (--focus ou tecla F); as outras rodam sem desenho
+FOCUS_VIEW = "--focus" in sys.argv
+# Frames mínimos antes de trocar a quadra em foco (evita ficar pulando entre líderes empatados)
+FOCUS_HOLD_FRAMES = 30
 
 # QUADRA
 GRASS_COLOR = (80, 180, 80)
@@ -82,7 +146,11 @@ BOT_COLOR = (205, 76, 150)
 AGENT_COLOR = (76, 150, 205)
 DUAL_AGENT_COLOR = (50, 120, 176)
 HIDDEN_SIZE_LAYER = [ 24, 8]
-INPUT_SIZE_LAYER = 9
+# ENTRADAS DA REDE: features da observação, na ordem (ex: --features=pos,ball_pos,ball_vel,side;
+# lista completa em features.py). Só as escolhidas são calculadas e o tamanho da entrada segue delas
+from features import DEFAULT_FEATURES, feature_size
+FEATURES = _arg_value("features", ",".join(DEFAULT_FEATURES)).split(",")
+INPUT_SIZE_LAYER = feature_size(FEATURES)
 # HIDDEN_SIZE_LAYER = [24,8]
 # HIDDEN_SIZE_LAYER = [24]s
 
@@ -1,5 +1,3 @@
-import pygame
-
 class Entity:
     def __init__(self, x, y, begin, end, screen,radius,color=(255, 255, 255), speed=5):
         self.x = x
@@ -11,8 +9,18 @@ class Entity:
         self.end= end
         self.screen = screen
 
-    def draw(self):
-        pygame.draw.circle(self.screen, self.color, (int(self.x), int(self.y)), self.radius)
+    @property
+    def rect(self):
+        # Rect só existe para desenho: criado sob demanda para que a física rode sem pygame
+        import pygame
+        return pygame.Rect(int(self.x - self.radius), int(self.y - self.radius), int(self.radius * 2), int(self.radius * 2))
+
+    def draw(self, surface=None):
+        import pygame
+        # surface: onde desenhar (None => a tela)
+        if surface is None:
+            surface = self.screen
+        pygame.draw.circle(surface, self.color, (int(self.x), int(self.y)), self.radius)
 
     def move(self, dx, dy):
         self.x += dx * self.speed
@@ -0,0 +1,388 @@
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+from arena_batch import ArenaBatch, STATUS_IDLE
+from redeneural import RedeNeuralLote
+from perf import timers
+
+# ========================
+# AVALIAÇÃO DAS PARTIDAS DE UMA GERAÇÃO
+# ========================
+# Roda uma rodada inteira (uma partida por pareamento) no ArenaBatch, com as mesmas
+# recompensas por tick dos treinadores, e devolve fitness e gols por partida.
+# Com workers > 1 os pareamentos são divididos entre processos. Cada partida tem a
+# sua semente (jitter do bot) e a sua quadra, e os resultados voltam na ordem dos
+# pareamentos: o resultado não depende do número de workers.
+
+
+def arena_geometry(n):
+    """Cantos (begin, end) das n quadras simuladas: todas na arena canônica, com origem em (0, 0)"""
+    begin = np.zeros((n, 2))
+    end = np.tile([float(config.ARENA_WIDTH), float(config.ARENA_HEIGHT)], (n, 1))
+    return begin, end
+
+
+def grid_geometry(n):
+    """Cantos (begin, end) na tela (só desenho): a partida i usa a célula i da grade"""
+    cell_width = config.GAME_WIDTH / config.COLUMNS
+    cell_height = config.WINDOW_HEIGHT / config.ROWS
+    cells = np.arange(n) % (config.ROWS * config.COLUMNS)
+
+    cx = (cells % config.COLUMNS) * cell_width
+    cy = (cells // config.COLUMNS) * cell_height
+    begin = np.stack([cx, cy], axis=1)
+    end = np.stack([cx + cell_width, cy + cell_height], axis=1)
+    return begin, end
+
+
+# --- RECOMPENSAS POR TICK ---
+# Recebem as quadras que seguem em andamento depois do tick (idx) e somam em
+# fitness[idx, slot] na mesma ordem das contas do loop original.
+# goals[idx, slot] conta os gols usados no controle de fase dos treinadores.
+
+def _tick_penalties(batch, idx, fitness, s):
+    # Penalidade temporal e por ficar parado
+    fitness[idx, s] -= 0.001
+    fitness[idx, s] -= np.where(batch.walking[idx, s] == 0, 0.1, 0)
+
+
+def reward_pressure(batch, idx, fitness, goals):
+    """train_agent_robust: pressão graduada no campo de ataque, gols 50/20"""
+    ball_relative_x = (batch.ball_x[idx] - batch.begin[idx, 0]) / batch.largura[idx]
+    scored = batch.pontuou[idx]
+
+    for s in range(2):
+        if batch.players[s] != 'agent':
+            continue
+        if s == 0:
+            attacking = ball_relative_x > 0.5
+            reward = (0.02 + ((ball_relative_x - 0.5) * 0.1)) / 10
+        else:
+            attacking = ball_relative_x < 0.5
+            reward = (0.02 + ((0.5 - ball_relative_x) * 0.1)) / 10
+        fitness[idx, s] += np.where(attacking, reward, -0.01)
+
+        # Todo gol da quadra conta para a fase dos dois lados
+        my_score = batch.score[idx, s]
+        enemy_score = batch.score[idx, 1 - s]
+        fitness[idx, s] += np.where(scored, my_score * 50, 0)
+        fitness[idx, s] -= np.where(scored, enemy_score * 20, 0)
+        goals[idx, s] += scored
+
+        _tick_penalties(batch, idx, fitness, s)
+
+    batch.pontuou[idx] = False
+
+
+def reward_pressure_vs_bot(batch, idx, fitness, goals):
+    """agent_vs_bot: pressão graduada para o agente (slot 0), +50 no gol dele, -20 no do bot"""
+    ball_relative_x = (batch.ball_x[idx] - batch.begin[idx, 0]) / batch.largura[idx]
+    reward = (0.02 + ((ball_relative_x - 0.5) * 0.1)) / 10
+    fitness[idx, 0] += np.where(ball_relative_x > 0.5, reward, -0.01)
+
+    scored = batch.pontuou[idx]
+    agent_goal = scored & (batch.last_scorer[idx] == 0)
+    bot_goal = scored & ~agent_goal
+    fitness[idx, 0] += np.where(agent_goal, batch.score[idx, 0] * 50, 0)
+    fitness[idx, 0] -= np.where(bot_goal, batch.score[idx, 1] * 20, 0)
+    goals[idx, 0] += agent_goal
+
+    _tick_penalties(batch, idx, fitness, 0)
+    batch.pontuou[idx] = False
+
+
+def reward_territory(batch, idx, fitness, goals):
+    """train_agent / train_agent_segregated: ±0.01 pelo lado da bola, gols 30/15"""
+    ball_x = batch.ball_x[idx] - batch.begin[idx, 0]
+    half = batch.largura[idx] / 2
+    scored = batch.pontuou[idx]
+
+    for s in range(2):
+        if batch.players[s] != 'agent':
+            continue
+        attacking = (ball_x > half) if s == 0 else (ball_x < half)
+        fitness[idx, s] += np.where(attacking, 0.01, -0.01)
+
+        my_score = batch.score[idx, s]
+        enemy_score = batch.score[idx, 1 - s]
+        fitness[idx, s] += np.where(scored, my_score * 30, 0)
+        fitness[idx, s] -= np.where(scored, enemy_score * 15, 0)
+        goals[idx, s] += scored
+
+        _tick_penalties(batch, idx, fitness, s)
+
+    batch.pontuou[idx] = False
+
+
+# Modo de treino -> (jogadores da quadra, recompensa por tick)
+MODES = {
+    'robust': (['agent', 'agent'], reward_pressure),
+    'vs_bot': (['agent', 'bot'], reward_pressure_vs_bot),
+    'segregated': (['agent', 'agent'], reward_territory),
+    'agent': (['agent', 'bot'], reward_territory),
+}
+
+
+# Lotes já criados, por jogadores e número de quadras: a geometria se repete a cada
+# rodada, então o mesmo ArenaBatch é só resetado (em cada worker há um pool próprio)
+_batches = {}
+
+
+def _pooled_batch(begin, end, players):
+    key = (tuple(players), len(begin))
+    batch = _batches.get(key)
+    if batch is None or not batch.same_geometry(begin, end, players):
+        batch = _batches[key] = ArenaBatch(begin, end, players)
+    return batch
+
+
+def _compacted(batch, live):
+    """
+    Lote novo só com as quadras live do lote, no mesmo estado: as encerradas ficam de fora.
+    Fora do pool: cada compactação tem um tamanho diferente e o lote é descartado no fim da rodada.
+    """
+    small = ArenaBatch(batch.begin[live], batch.end[live], batch.players)
+    small.reset([None if lote is None else lote.subset(live) for lote in batch.lotes], None)
+    small.restore(batch.snapshot(live))
+    return small
+
+
+def run_matches(mode, brains, ticks, begin, end, seeds=None, on_tick=None, start=None):
+    """
+    Roda uma partida por pareamento, todas no mesmo ArenaBatch.
+    brains: [cérebros do slot 0, cérebros do slot 1], cada um uma lista de RedeNeural
+            ou um RedeNeuralLote (None no slot do bot)
+    seeds: uma semente por partida para o sorteio do bot (None => módulo random)
+    on_tick(batch, fitness, goals, tick): chamado a cada tick; retornar False interrompe
+    start: ArenaState de onde as partidas começam (de uma quadra: todas partem dela),
+           no lugar da saída; com o sorteio do bot no snapshot, ele substitui o das seeds
+    Retorna (fitness, goals, score), arrays (n, 2), ou None se interrompido.
+
+    Sem on_tick, quando as partidas em andamento caem para COMPACT_RATIO do lote elas
+    passam para um lote menor: o custo do tick acompanha só as partidas vivas.
+    """
+    players, reward = MODES[mode]
+    rngs = None if seeds is None else [random.Random(seed) for seed in seeds]
+    batch = _pooled_batch(begin, end, players)
+    batch.reset([brains[s] if players[s] == 'agent' else None for s in range(2)], rngs)
+    if start is not None:
+        batch.restore(start)
+
+    fitness = np.zeros((batch.n, 2))
+    goals = np.zeros((batch.n, 2), dtype=np.int64)
+    score = np.zeros((batch.n, 2), dtype=np.int64)
+    # Partida de cada linha do lote atual e o fitness/gols dessas linhas
+    # (sem compactação: o próprio fitness/goals)
+    arenas = np.arange(batch.n)
+    rows_fitness, rows_goals = fitness, goals
+
+    for tick in range(1, ticks + 1):
+        live = np.flatnonzero(batch.status == 0)
+        if live.size == 0:
+            break
+        if on_tick is None and live.size <= batch.n * config.COMPACT_RATIO:
+            fitness[arenas], goals[arenas], score[arenas] = rows_fitness, rows_goals, batch.score
+            batch = _compacted(batch, live)
+            arenas = arenas[live]
+            rows_fitness, rows_goals = fitness[arenas], goals[arenas]
+        batch.step()
+        t = timers.start()
+        reward(batch, np.flatnonzero(batch.status == 0), rows_fitness, rows_goals)
+        timers.lap('rewards', t)
+        if on_tick is not None and on_tick(batch, fitness, goals, tick) is False:
+            return None
+    fitness[arenas], goals[arenas], score[arenas] = rows_fitness, rows_goals, batch.score
+
+    # Recompensa final da partida
+    for s in range(2):
+        if players[s] == 'agent':
+            fitness[:, s] += score[:, s] * 100
+            fitness[:, s] -= score[:, 1 - s] * 50
+
+    return fitness, goals, score
+
+
+def stream_matches(mode, brains, ticks, slots, seeds=None):
+    """
+    Roda uma fila de partidas em `slots` quadras: brains[s][j] joga no slot s da partida j
+    (RedeNeuralLote ou lista de RedeNeural; None no slot do bot). Quando uma partida acaba
+    (WIN_SCORE ou ticks), a próxima da fila começa na mesma quadra, sem esperar as outras.
+    seeds: uma semente por partida (None => módulo random)
+    Retorna (fitness, goals, score) por partida, na ordem da fila: os mesmos de run_matches,
+    já que uma partida não depende de em que quadra nem em que tick começou.
+    """
+    players, reward = MODES[mode]
+    brains = [b if b is None or isinstance(b, RedeNeuralLote) else RedeNeuralLote(list(b)) for b in brains]
+    total = next(b.size for b in brains if b is not None)
+
+    def match_rng(j):
+        return random if seeds is None else random.Random(seeds[j])
+
+    slots = max(1, min(slots, total))
+    batch = _pooled_batch(*arena_geometry(slots), players)
+    first = np.arange(slots)
+    batch.reset([None if b is None else b.subset(first) for b in brains], [match_rng(j) for j in first])
+
+    fitness = np.zeros((total, 2))
+    goals = np.zeros((total, 2), dtype=np.int64)
+    score = np.zeros((total, 2), dtype=np.int64)
+    # Por linha do lote: partida atual, ticks já jogados por ela, fitness e gols dela até aqui
+    match = first.copy()
+    elapsed = np.zeros(slots, dtype=np.int64)
+    rows_fitness = np.zeros((slots, 2))
+    rows_goals = np.zeros((slots, 2), dtype=np.int64)
+    queued = slots
+
+    while True:
+        live = np.flatnonzero(batch.status == 0)
+        if live.size == 0:
+            break
+        # Fila vazia: as quadras que ficaram livres saem do lote, como em run_matches
+        if queued == total and live.size <= batch.n * config.COMPACT_RATIO:
+            batch = _compacted(batch, live)
+            match, elapsed = match[live], elapsed[live]
+            rows_fitness, rows_goals = rows_fitness[live], rows_goals[live]
+            live = np.arange(batch.n)
+
+        batch.step()
+        t = timers.start()
+        reward(batch, np.flatnonzero(batch.status == 0), rows_fitness, rows_goals)
+        timers.lap('rewards', t)
+        elapsed[live] += 1
+
+        done = live[(batch.status[live] != 0) | (elapsed[live] >= ticks)]
+        if done.size == 0:
+            continue
+        finished = match[done]
+        fitness[finished] = rows_fitness[done]
+        goals[finished] = rows_goals[done]
+        score[finished] = batch.score[done]
+
+        # As quadras liberadas recebem as próximas partidas da fila; sem fila, ficam paradas
+        take = min(done.size, total - queued)
+        refill = done[:take]
+        batch.status[done[take:]] = STATUS_IDLE
+        if take:
+            upcoming = np.arange(queued, queued + take)
+            queued += take
+            for s, lote in enumerate(batch.lotes):
+                if lote is not None:
+                    lote.genomes[refill] = brains[s].genomes[upcoming]
+            for k, j in zip(refill, upcoming):
+                batch.rngs[k] = match_rng(j)
+            batch.restart(refill)
+            match[refill] = upcoming
+            elapsed[refill] = 0
+            rows_fitness[refill] = 0
+            rows_goals[refill] = 0
+
+    # Recompensa final da partida
+    for s in range(2):
+        if players[s] == 'agent':
+            fitness[:, s] += score[:, s] * 100
+            fitness[:, s] -= score[:, 1 - s] * 50
+
+    return fitness, goals, score
+
+
+def _run_shard(mode, brains, ticks, begin, end, seeds, start):
+    # No worker: roda a fatia e devolve também as medidas dos timers (zeradas a cada fatia)
+    timers.reset()
+    return run_matches(mode, brains, ticks, begin, end, seeds, start=start), timers.export()
+
+
+def _stream_shard(mode, brains, ticks, slots, seeds):
+    timers.reset()
+    return stream_matches(mode, brains, ticks, slots, seeds), timers.export()
+
+
+def _shard(brains, chunk):
+    if brains is None:
+        return None
+    if isinstance(brains, RedeNeuralLote):
+        return brains.subset(chunk)
+    return [brains[i] for i in chunk]
+
+
+class MatchEvaluator:
+    def __init__(self, mode, workers=1):
+        """
+        mode: chave de MODES (recompensa e jogadores do treinador)
+        workers: processos para dividir os pareamentos (1 => roda no processo atual)
+        """
+        if mode not in MODES:
+            raise ValueError(f"Modo de avaliação desconhecido: '{mode}'")
+        self.mode = mode
+        self.workers = max(1, int(workers))
+        self.pool = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+
+    def run(self, brains, ticks, seeds, on_tick=None, start=None):
+        """
+        Avalia uma rodada: brains[s][i] joga no slot s da partida i.
+        Com on_tick (janela aberta) a rodada roda inteira aqui, tick a tick.
+        start: ArenaState de onde as partidas começam (veja run_matches)
+        """
+        n = brains[0].size if isinstance(brains[0], RedeNeuralLote) else len(brains[0])
+        begin, end = arena_geometry(n)
+
+        if self.pool is None or on_tick is not None or n < 2:
+            return run_matches(self.mode, brains, ticks, begin, end, seeds, on_tick, start)
+
+        chunks = [c for c in np.array_split(np.arange(n), self.workers) if c.size]
+        futures = [self.pool.submit(_run_shard, self.mode, [_shard(b, c) for b in brains],
+                                    ticks, begin[c], end[c], _shard(seeds, c),
+                                    start if start is None or len(start) == 1 else start.select(c))
+                   for c in chunks]
+        results = []
+        for future in futures:
+            result, samples = future.result()
+            results.append(result)
+            timers.merge(samples)
+
+        # Junta na ordem dos pareamentos
+        return tuple(np.concatenate([r[k] for r in results]) for k in range(3))
+
+    def stream(self, brains, ticks, seeds, slots):
+        """
+        Avalia uma fila de partidas (brains[s][j]: slot s da partida j) em `slots` quadras
+        que são reaproveitadas assim que a partida delas acaba (veja stream_matches).
+        Com workers > 1 cada processo leva um pedaço da fila e das quadras.
+        """
+        n = brains[0].size if isinstance(brains[0], RedeNeuralLote) else len(brains[0])
+        if self.pool is None or n < 2:
+            return stream_matches(self.mode, brains, ticks, slots, seeds)
+
+        chunks = [c for c in np.array_split(np.arange(n), self.workers) if c.size]
+        shard_slots = max(1, -(-slots // len(chunks)))
+        futures = [self.pool.submit(_stream_shard, self.mode, [_shard(b, c) for b in brains],
+                                    ticks, shard_slots, _shard(seeds, c))
+                   for c in chunks]
+        results = []
+        for future in futures:
+            result, samples = future.result()
+            results.append(result)
+            timers.merge(samples)
+        return tuple(np.concatenate([r[k] for r in results]) for k in range(3))
+
+    def run_rounds(self, rounds, ticks):
+        """
+        Vários rounds independentes [(brains, seeds), ...] numa fila só, com as quadras de um
+        round: quem termina cedo já começa uma partida do round seguinte.
+        Retorna [(fitness, goals, score)] por round, como run().
+        """
+        sizes = [b[0].size if isinstance(b[0], RedeNeuralLote) else len(b[0]) for b, _ in rounds]
+        brains = [None if rounds[0][0][s] is None else RedeNeuralLote.concat([b[s] for b, _ in rounds])
+                  for s in range(2)]
+        seeds = None if rounds[0][1] is None else [seed for _, round_seeds in rounds for seed in round_seeds]
+        result = self.stream(brains, ticks, seeds, slots=sizes[0])
+
+        bounds = np.cumsum(sizes)[:-1]
+        return list(zip(*(np.split(array, bounds) for array in result)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
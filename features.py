@@ -0,0 +1,148 @@
+from functools import cached_property
+import numpy as np
+
+# ========================
+# FEATURES DA OBSERVAÇÃO (entradas da rede)
+# ========================
+# Cada feature é um nome -> (largura, função). A função recebe uma fonte (BatchSource
+# para o ArenaBatch, AgentSource para um Agent) e devolve as colunas já normalizadas.
+# As fontes buscam cada valor só quando alguma feature escolhida pede (cached_property),
+# então uma feature fora da lista não custa nada. As mesmas contas servem para arrays
+# (todas as quadras de uma vez) e para floats (um Agent).
+#
+# Posições normalizadas pela quadra (0..1), vetores relativos pela largura/altura,
+# distâncias pela diagonal, ângulos por pi e velocidades pela velocidade máxima.
+
+# Limite de velocidade da bola (mesmo valor de Ball / ArenaBatch)
+MAX_BALL_SPEED = 15
+
+FEATURES = {
+    # Posições na quadra
+    'pos': (2, lambda c: ((c.x - c.x0) / c.w, (c.y - c.y0) / c.h)),
+    'ball_pos': (2, lambda c: ((c.ball_x - c.x0) / c.w, (c.ball_y - c.y0) / c.h)),
+    'opponent_pos': (2, lambda c: ((c.opp_x - c.x0) / c.w, (c.opp_y - c.y0) / c.h)),
+    'goal_pos': (2, lambda c: ((c.goal_x - c.x0) / c.w, (c.goal_y - c.y0) / c.h)),
+    # Lado do campo: +1 ataca para a direita, -1 para a esquerda
+    'side': (1, lambda c: (c.sign,)),
+
+    # Velocidades
+    'vel': (2, lambda c: (c.vx / c.speed, c.vy / c.speed)),
+    'ball_vel': (2, lambda c: (c.ball_vx / MAX_BALL_SPEED, c.ball_vy / MAX_BALL_SPEED)),
+    'opponent_vel': (2, lambda c: (c.opp_vx / c.speed, c.opp_vy / c.speed)),
+
+    # Vetores a partir do próprio jogador
+    'ball_rel': (2, lambda c: ((c.ball_x - c.x) / c.w, (c.ball_y - c.y) / c.h)),
+    'opponent_rel': (2, lambda c: ((c.opp_x - c.x) / c.w, (c.opp_y - c.y) / c.h)),
+    'goal_rel': (2, lambda c: ((c.goal_x - c.x) / c.w, (c.goal_y - c.y) / c.h)),
+
+    # Distâncias e ângulos
+    'ball_dist': (1, lambda c: (np.hypot(c.ball_x - c.x, c.ball_y - c.y) / c.diagonal,)),
+    'ball_angle': (1, lambda c: (np.arctan2(c.ball_y - c.y, c.ball_x - c.x) / np.pi,)),
+    'ball_dir': (1, lambda c: (np.arctan2(c.ball_vy, c.ball_vx) / np.pi,)),
+    'opponent_dist': (1, lambda c: (np.hypot(c.opp_x - c.x, c.opp_y - c.y) / c.diagonal,)),
+    'opponent_angle': (1, lambda c: (np.arctan2(c.opp_y - c.y, c.opp_x - c.x) / np.pi,)),
+    'opponent_dir': (1, lambda c: (np.arctan2(c.opp_vy, c.opp_vx) / np.pi,)),
+    'goal_dist': (1, lambda c: (np.hypot(c.goal_x - c.x, c.goal_y - c.y) / c.diagonal,)),
+    'goal_angle': (1, lambda c: (np.arctan2(c.goal_y - c.y, c.goal_x - c.x) / np.pi,)),
+}
+
+# As 9 entradas originais do Agent
+DEFAULT_FEATURES = ['pos', 'ball_pos', 'opponent_pos', 'goal_pos', 'side']
+
+
+def feature_size(names):
+    """Quantidade de entradas da rede para a lista de features"""
+    unknown = [name for name in names if name not in FEATURES]
+    if unknown:
+        raise ValueError(f"Features desconhecidas: {unknown} (disponíveis: {', '.join(FEATURES)})")
+    return sum(FEATURES[name][0] for name in names)
+
+
+class FeatureSet:
+    def __init__(self, names):
+        self.names = list(names)
+        self.size = feature_size(self.names)
+        # (primeira coluna, função) de cada feature, na ordem das entradas
+        self._columns = []
+        start = 0
+        for name in self.names:
+            width, fn = FEATURES[name]
+            self._columns.append((start, fn))
+            start += width
+
+    def compute(self, source, out):
+        """Preenche out (linhas, size) ou (size,) com as features da fonte e retorna out"""
+        for start, fn in self._columns:
+            for k, column in enumerate(fn(source)):
+                out[..., start + k] = column
+        return out
+
+
+class BatchSource:
+    """Valores do slot nas quadras idx de um ArenaBatch (arrays), buscados sob demanda"""
+
+    def __init__(self, batch, slot, idx):
+        self.batch = batch
+        self.slot = slot
+        self.other = 1 - slot
+        self.idx = idx
+        self.sign = 1 if slot == 0 else -1
+
+    x0 = cached_property(lambda self: self.batch.begin[self.idx, 0])
+    y0 = cached_property(lambda self: self.batch.begin[self.idx, 1])
+    w = cached_property(lambda self: self.batch.largura[self.idx])
+    h = cached_property(lambda self: self.batch.altura[self.idx])
+    diagonal = cached_property(lambda self: np.hypot(self.w, self.h))
+    speed = cached_property(lambda self: self.batch.speed[self.idx, self.slot])
+
+    x = cached_property(lambda self: self.batch.px[self.idx, self.slot])
+    y = cached_property(lambda self: self.batch.py[self.idx, self.slot])
+    vx = cached_property(lambda self: self.batch.pvx[self.idx, self.slot])
+    vy = cached_property(lambda self: self.batch.pvy[self.idx, self.slot])
+
+    ball_x = cached_property(lambda self: self.batch.ball_x[self.idx])
+    ball_y = cached_property(lambda self: self.batch.ball_y[self.idx])
+    ball_vx = cached_property(lambda self: self.batch.ball_vx[self.idx])
+    ball_vy = cached_property(lambda self: self.batch.ball_vy[self.idx])
+
+    opp_x = cached_property(lambda self: self.batch.px[self.idx, self.other])
+    opp_y = cached_property(lambda self: self.batch.py[self.idx, self.other])
+    opp_vx = cached_property(lambda self: self.batch.pvx[self.idx, self.other])
+    opp_vy = cached_property(lambda self: self.batch.pvy[self.idx, self.other])
+
+    goal_x = cached_property(lambda self: self.batch.attack_goal_x[self.idx, self.slot])
+    goal_y = cached_property(lambda self: self.batch.attack_goal_y[self.idx])
+
+
+class AgentSource:
+    """Valores de um Agent na sua Quadra (floats). Sem adversário, ele ocupa o lugar do próprio agente"""
+
+    def __init__(self, agent, opponent):
+        self.agent = agent
+        self.opponent = opponent if opponent is not None else agent
+        self.sign = 1 if agent.team == 0 else -1
+
+    x0 = cached_property(lambda self: self.agent.begin[0])
+    y0 = cached_property(lambda self: self.agent.begin[1])
+    w = cached_property(lambda self: self.agent.end[0] - self.agent.begin[0])
+    h = cached_property(lambda self: self.agent.end[1] - self.agent.begin[1])
+    diagonal = cached_property(lambda self: np.hypot(self.w, self.h))
+    speed = cached_property(lambda self: self.agent.speed)
+
+    x = cached_property(lambda self: self.agent.x)
+    y = cached_property(lambda self: self.agent.y)
+    vx = cached_property(lambda self: self.agent.vx)
+    vy = cached_property(lambda self: self.agent.vy)
+
+    ball_x = cached_property(lambda self: self.agent.target.x)
+    ball_y = cached_property(lambda self: self.agent.target.y)
+    ball_vx = cached_property(lambda self: self.agent.target.vx)
+    ball_vy = cached_property(lambda self: self.agent.target.vy)
+
+    opp_x = cached_property(lambda self: self.opponent.x)
+    opp_y = cached_property(lambda self: self.opponent.y)
+    opp_vx = cached_property(lambda self: getattr(self.opponent, 'vx', 0))
+    opp_vy = cached_property(lambda self: getattr(self.opponent, 'vy', 0))
+
+    goal_x = cached_property(lambda self: self.agent.attack_goal_x)
+    goal_y = cached_property(lambda self: self.agent.attack_goal_y)
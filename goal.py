@@ -1,6 +1,3 @@
-import pygame
-
-
 class Goal:
     """Representa uma trave/goal em uma das extremidades da quadra.
 
@@ -25,34 +22,49 @@ class Goal:
         default_depth = max(6, int(largura * 0.04))
         self.depth = depth_pixels if depth_pixels is not None else default_depth
 
+        # Área da trave guardada como inteiros (left, top, w, h), truncados como o pygame.Rect faria,
+        # para que a detecção de gol funcione sem pygame (modo headless)
         if side == 'left':
             # rect posicionada dentro da quadra, à esquerda, expandida para detectabilidade
-            self.rect = pygame.Rect(begin[0] - self.depth, self.y_top, self.depth * 2, self.height)
+            self.area = (int(begin[0] - self.depth), int(self.y_top), int(self.depth * 2), int(self.height))
             # quando a bola entra na trave esquerda, o time da direita (1) pontua
             self.score_for = 1
         else:
             # rect posicionada dentro da quadra, à direita, expandida para detectabilidade
-            self.rect = pygame.Rect(end[0] - self.depth, self.y_top, self.depth * 2, self.height)
+            self.area = (int(end[0] - self.depth), int(self.y_top), int(self.depth * 2), int(self.height))
             self.score_for = 0
 
-    def draw(self):
+    @property
+    def rect(self):
+        import pygame
+        return pygame.Rect(self.area)
+
+    def draw(self, surface=None):
+        import pygame
+        if surface is None:
+            surface = self.screen
+        rect = self.rect
         # Desenha trave preenchida e borda para maior visibilidade
         goal_fill = (255, 255, 255)
         border_color = (200, 50, 50)
-        pygame.draw.rect(self.screen, goal_fill, self.rect)
+        pygame.draw.rect(surface, goal_fill, rect)
         border_w = max(1, int(self.depth * 0.3))
-        pygame.draw.rect(self.screen, border_color, self.rect, border_w)
+        pygame.draw.rect(surface, border_color, rect, border_w)
 
         # Desenha 'postes' superior e inferior (marcadores internos)
         post_thickness = max(1, int(self.height * 0.06))
-        left_x = self.rect.left
-        right_x = self.rect.right
-        top_y = self.rect.top
-        bottom_y = self.rect.bottom
+        left_x = rect.left
+        right_x = rect.right
+        top_y = rect.top
+        bottom_y = rect.bottom
 
         # desenha pequenas linhas brancas indicando os postes (internas)
-        pygame.draw.line(self.screen, (255, 255, 255), (left_x, top_y), (right_x, top_y), post_thickness)
-        pygame.draw.line(self.screen, (255, 255, 255), (left_x, bottom_y), (right_x, bottom_y), post_thickness)
+        pygame.draw.line(surface, (255, 255, 255), (left_x, top_y), (right_x, top_y), post_thickness)
+        pygame.draw.line(surface, (255, 255, 255), (left_x, bottom_y), (right_x, bottom_y), post_thickness)
 
     def contains_ball(self, ball):
-        return self.rect.collidepoint(int(ball.x), int(ball.y))
+        # Mesma semântica de pygame.Rect.collidepoint: borda direita/inferior exclusiva
+        left, top, w, h = self.area
+        bx = int(ball.x)
+        by = int(ball.y)
+        return left <= bx < left + w and top <= by < top + h
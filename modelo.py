@@ -0,0 +1,126 @@
+import json
+import os
+import struct
+import sys
+import numpy as np
+
+import config
+from redeneural import RedeNeural, RedeNeuralLote, genome_layout
+from features import feature_size
+
+# ========================
+# FORMATO DE MODELO (.rede)
+# ========================
+# Sem pickle: um cabeçalho fixo, um JSON com a arquitetura e o genoma float32 cru,
+# alinhado em 64 bytes para ser aberto com np.memmap sem cópia.
+#
+#   0  magic   b"RDNN"
+#   4  versão  uint16
+#   6  (reservado) uint16
+#   8  tamanho do JSON  uint32
+#   12 offset do genoma uint32
+#   16 JSON (utf-8): input_size, hidden_sizes, output_size, genome_size, dtype, features, meta
+#   .. genoma (genome_size x float32 little-endian)
+
+MAGIC = b"RDNN"
+VERSION = 1
+MODEL_EXT = ".rede"
+_FIXED = struct.Struct("<4sHHII")
+_ALIGN = 64
+
+
+def save_model(brain, path, meta=None):
+    """Salva uma RedeNeural no formato .rede (escrita atômica). meta: dict livre (ex: geração)"""
+    header = {
+        'input_size': brain.input_size,
+        'hidden_sizes': list(brain.hidden_sizes),
+        'output_size': brain.output_size,
+        'genome_size': int(brain.genome.size),
+        'dtype': '<f4',
+        'INPUT_SIZE_LAYER': brain.input_size,
+        # Features das entradas: só as da config atual, e só se batem com a largura da rede
+        # (ex: um modelo convertido não tem lista conhecida => null)
+        'features': list(config.FEATURES) if feature_size(config.FEATURES) == brain.input_size else None,
+        'meta': meta or {},
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_offset = -(-(_FIXED.size + len(header_bytes)) // _ALIGN) * _ALIGN
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_FIXED.pack(MAGIC, VERSION, 0, len(header_bytes), data_offset))
+        f.write(header_bytes)
+        f.write(b"\0" * (data_offset - _FIXED.size - len(header_bytes)))
+        f.write(np.ascontiguousarray(brain.genome, dtype='<f4').tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_header(path):
+    """Lê só o cabeçalho (arquitetura + meta) de um .rede; inclui 'data_offset'"""
+    with open(path, 'rb') as f:
+        fixed = f.read(_FIXED.size)
+        if len(fixed) < _FIXED.size:
+            raise ValueError(f"{path}: arquivo curto demais para um modelo .rede")
+        magic, version, _, header_size, data_offset = _FIXED.unpack(fixed)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: não é um modelo .rede")
+        if version > VERSION:
+            raise ValueError(f"{path}: versão {version} do formato não suportada (máx {VERSION})")
+        header = json.loads(f.read(header_size).decode('utf-8'))
+
+    _, genome_size = genome_layout(header['input_size'], header['hidden_sizes'], header['output_size'])
+    if genome_size != header['genome_size']:
+        raise ValueError(f"{path}: genoma com {header['genome_size']} valores, a arquitetura pede {genome_size}")
+    features = header.get('features')
+    if features is not None and feature_size(features) != header['input_size']:
+        raise ValueError(f"{path}: features {features} dão {feature_size(features)} entradas, a rede tem {header['input_size']}")
+    header['version'] = version
+    header['data_offset'] = data_offset
+    return header
+
+
+def load_model(path, mmap=True):
+    """
+    Abre um .rede como RedeNeural. Com mmap o genoma é mapeado do arquivo sem cópia
+    (somente leitura: use .copy() antes de mutar).
+    """
+    header = read_header(path)
+    if header['input_size'] != config.INPUT_SIZE_LAYER:
+        # Ex: modelos antigos convertidos (11 ou 7 entradas); não servem para treinar/jogar com a config atual
+        print(f"⚠️ {path}: rede com {header['input_size']} entradas, a config atual usa {config.INPUT_SIZE_LAYER}")
+    elif header.get('features') is not None and header['features'] != list(config.FEATURES):
+        print(f"⚠️ {path}: rede treinada com as features {header['features']}, a config atual usa {list(config.FEATURES)}")
+    if mmap:
+        genome = np.memmap(path, dtype='<f4', mode='r', offset=header['data_offset'], shape=(header['genome_size'],))
+    else:
+        genome = np.fromfile(path, dtype='<f4', count=header['genome_size'], offset=header['data_offset'])
+    return RedeNeural(header['input_size'], header['hidden_sizes'], header['output_size'], genome=genome)
+
+
+def load_lote(paths):
+    """Empilha vários .rede (mesma arquitetura) em um RedeNeuralLote, ex: para avaliar modelos salvos"""
+    brains = [load_model(path) for path in paths]
+    return RedeNeuralLote.from_genomes(np.stack([b.genome for b in brains]), brains[0].input_size, brains[0].hidden_sizes, brains[0].output_size)
+
+
+def convert_pickle(pkl_path, out_path=None):
+    """Converte um modelo .pkl antigo (RedeNeural em pickle) para .rede. Só para arquivos confiáveis."""
+    import pickle
+    with open(pkl_path, 'rb') as f:
+        brain = pickle.load(f)
+    if out_path is None:
+        out_path = os.path.splitext(pkl_path)[0] + MODEL_EXT
+    save_model(brain, out_path, meta={'converted_from': os.path.basename(pkl_path)})
+    return out_path
+
+
+if __name__ == "__main__":
+    # Conversor: python modelo.py models/  (ou arquivos .pkl soltos)
+    targets = sys.argv[1:] or ["models"]
+    for target in targets:
+        if os.path.isdir(target):
+            paths = sorted(os.path.join(root, name) for root, _, names in os.walk(target) for name in names if name.endswith(".pkl"))
+        else:
+            paths = [target]
+        for pkl_path in paths:
+            print(f"{pkl_path} -> {convert_pickle(pkl_path)}")
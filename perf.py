@@ -0,0 +1,109 @@
+import time
+import numpy as np
+
+import config
+
+# ========================
+# TIMERS POR FASE DO TICK
+# ========================
+# Mede onde vai o tempo de cada geração: física, rede, recompensas, desenho, GA.
+# Cada medida é um perf_counter_ns + um append (~0.2 µs), barato o bastante para
+# ficar ligado sempre (--no-timers desliga).
+#
+#   t = timers.start()
+#   ...
+#   t = timers.lap('collision', t)   # registra a fase e já começa a próxima
+#
+# Com --workers=N as medidas dos processos voltam junto com os resultados: os totais
+# somam o tempo de CPU de todos os workers (podem passar do tempo de parede).
+
+# Fases na ordem do tick -> rótulo do log
+PHASES = {
+    'collision': "colisão",
+    'ball': "bola",
+    'observe': "obs",
+    'infer': "rede",
+    'players': "jogadores",
+    'rewards': "recompensa",
+    'events': "eventos/fps",
+    'draw': "quadras",
+    'sidebar': "sidebar",
+    'flip': "flip",
+    'evolve': "evolução",
+}
+
+_now = time.perf_counter_ns
+
+
+class PhaseTimers:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.samples = {phase: [] for phase in PHASES}
+        self.last = {}
+        self._since = _now()
+
+    def start(self):
+        return _now() if self.enabled else 0
+
+    def lap(self, phase, t0):
+        """Registra now - t0 na fase e retorna now (início da próxima medida)"""
+        if not self.enabled:
+            return 0
+        now = _now()
+        self.samples[phase].append(now - t0)
+        return now
+
+    def export(self):
+        """Medidas cruas (ns) das fases com amostras, para mandar de um worker ao processo principal"""
+        return {phase: samples for phase, samples in self.samples.items() if samples}
+
+    def merge(self, samples):
+        for phase, values in samples.items():
+            self.samples[phase].extend(values)
+
+    def reset(self):
+        for values in self.samples.values():
+            values.clear()
+        self._since = _now()
+
+    def summary(self):
+        """
+        {fase: {count, total_s, mean_us, p50_us, p95_us, p99_us, max_us}} das fases medidas,
+        mais 'wall_s': tempo de parede desde o último reset
+        """
+        result = {'wall_s': (_now() - self._since) / 1e9}
+        for phase, values in self.samples.items():
+            if not values:
+                continue
+            ns = np.array(values, dtype=np.float64)
+            p50, p95, p99 = np.percentile(ns, [50, 95, 99]) / 1e3
+            result[phase] = {
+                'count': len(values),
+                'total_s': ns.sum() / 1e9,
+                'mean_us': ns.mean() / 1e3,
+                'p50_us': p50,
+                'p95_us': p95,
+                'p99_us': p99,
+                'max_us': ns.max() / 1e3,
+            }
+        return result
+
+    def end_generation(self):
+        """Fecha a geração: guarda o resumo em self.last, zera as medidas e retorna o resumo"""
+        self.last = self.summary()
+        self.reset()
+        return self.last
+
+    def log_line(self, summary=None):
+        """Ex: '⏱ 12.3s | colisão 0.41s (p95 92µs) | rede 3.10s (p95 640µs) | ...'"""
+        summary = self.last if summary is None else summary
+        parts = [f"⏱ {summary.get('wall_s', 0):.2f}s"]
+        for phase, label in PHASES.items():
+            stats = summary.get(phase)
+            if stats:
+                parts.append(f"{label} {stats['total_s']:.2f}s (p95 {stats['p95_us']:.0f}µs)")
+        return " | ".join(parts)
+
+
+# Instância única usada pelo motor, pelo avaliador, pela janela e pelo GA
+timers = PhaseTimers(config.TIMERS)
@@ -1,4 +1,3 @@
-import pygame
 import math
 from entity import Entity
 import config
@@ -27,11 +26,10 @@ class Player(Entity):
         self.vy = 0
         self.acceleration = 0.8 # O quão rápido ele atinge a velocidade máxima
         self.friction = 0.85    # "Grip" no chão (quanto menor, mais sabão)
-        
-        # Atualiza o rect para colisões
-        self.rect = pygame.Rect(int(self.x - self.radius), int(self.y - self.radius), int(self.radius*2), int(self.radius*2))
 
     def get_input(self):
+        # Jogador humano depende do teclado: pygame só é importado quando ele existe
+        import pygame
         keys = pygame.key.get_pressed()
         input_x = 0
         input_y = 0
@@ -99,12 +97,13 @@ class Player(Entity):
             self.y = self.begin[1] + self.radius
             self.vy *= -0.5  # Rebote com amortecimento
 
-        # 6. Atualiza Rect e Desenha
-        self.rect.center = (int(self.x), int(self.y))
-        
+    def draw(self, surface=None):
+        import pygame
+        if surface is None:
+            surface = self.screen
         # Dica visual: Se apertar ESPAÇO (Chute), desenha um contorno branco
         keys = pygame.key.get_pressed()
         if keys[pygame.K_SPACE]:
-             pygame.draw.circle(self.screen, (255, 255, 255), (int(self.x), int(self.y)), self.radius + 3, 2)
+             pygame.draw.circle(surface, (255, 255, 255), (int(self.x), int(self.y)), self.radius + 3, 2)
 
-        self.draw()
+        super().draw(surface)
@@ -0,0 +1,101 @@
+import numpy as np
+import config
+from redeneural import RedeNeural, RedeNeuralLote, genome_layout, GENOME_DTYPE
+from perf import timers
+from seeds import default_generator, POPULATION
+
+# Linhas mutadas por vez (limita os buffers de sorteio, sem alocar por geração)
+MUTATION_CHUNK = 4096
+
+
+class Individuo:
+    def __init__(self, brain, fitness, arena=None, slot=None):
+        """Um indivíduo para exibir/salvar: cérebro, fitness e onde está jogando (quadra, slot)"""
+        self.brain = brain
+        self.fitness = fitness
+        self.arena = arena
+        self.slot = slot
+
+
+class Populacao:
+    def __init__(self, size, input_size=config.INPUT_SIZE_LAYER, hidden_size=config.HIDDEN_SIZE_LAYER, output_size=2, rng=None):
+        """
+        População inteira como uma matriz (size, G): um genoma por linha + o fitness de cada um.
+        rng: np.random.Generator dos sorteios (None => default_generator(POPULATION, 0))
+        """
+        self.size = size
+        self.input_size = input_size
+        self.hidden_sizes = [hidden_size] if isinstance(hidden_size, int) else list(hidden_size)
+        self.output_size = output_size
+        self.layout, self.genome_size = genome_layout(self.input_size, self.hidden_sizes, self.output_size)
+        self.rng = rng if rng is not None else default_generator(POPULATION, 0)
+
+        # Pesos ~ N(0, 1) e viéses zerados, como em RedeNeural
+        self.genomes = np.zeros((size, self.genome_size), dtype=GENOME_DTYPE)
+        for w_offset, shape, _, _ in self.layout:
+            n = shape[0] * shape[1]
+            self.genomes[:, w_offset:w_offset + n] = self.rng.standard_normal((size, n), dtype=GENOME_DTYPE)
+        self.fitness = np.zeros(size)
+
+        # Buffers da evolução, alocados uma vez: a próxima geração é escrita em _next
+        # e os dois trocam de papel (double buffering)
+        self._next = np.empty_like(self.genomes)
+        chunk = min(size, MUTATION_CHUNK)
+        self._noise = np.empty((chunk, self.genome_size), dtype=GENOME_DTYPE)
+        self._mask = np.empty((chunk, self.genome_size), dtype=bool)
+
+    def brain(self, i):
+        """RedeNeural do indivíduo i (view do genoma: vale até a próxima evolução)"""
+        return RedeNeural(self.input_size, self.hidden_sizes, self.output_size, genome=self.genomes[i])
+
+    def lote(self, idx=slice(None)):
+        """RedeNeuralLote com os indivíduos idx, na ordem dada (sem idx: a população inteira, sem cópia)"""
+        return RedeNeuralLote.from_genomes(self.genomes[idx], self.input_size, self.hidden_sizes, self.output_size)
+
+    def best(self):
+        """Índice do indivíduo com maior fitness (o primeiro, em caso de empate)"""
+        return int(np.argmax(self.fitness))
+
+    def evolve(self, elitism, mutation_rate, mutation_scale, rng=None):
+        """
+        Uma geração em operações vetorizadas: ordena pelo fitness, copia os elites,
+        sorteia os pais no top 50% e aplica mutação gaussiana nos filhos.
+        rng: sorteios desta geração (ex: SeedStreams.evolution); None => self.rng
+        Retorna o melhor fitness da geração avaliada; o fitness da nova é zerado.
+        """
+        t = timers.start()
+        rng = self.rng if rng is None else rng
+        order = np.argsort(-self.fitness, kind='stable')
+        best_fitness = self.fitness[order[0]]
+
+        # Elitismo (pelo menos 1)
+        num_elites = min(self.size, max(1, int(self.size * elitism)))
+        # Pais: Top 50%
+        parent_pool = order[:self.size // 2]
+        if parent_pool.size == 0:
+            parent_pool = order
+
+        nxt = self._next
+        np.take(self.genomes, order[:num_elites], axis=0, out=nxt[:num_elites], mode='clip')
+        parents = parent_pool[rng.integers(parent_pool.size, size=self.size - num_elites)]
+        np.take(self.genomes, parents, axis=0, out=nxt[num_elites:], mode='clip')
+        self._mutate(nxt[num_elites:], mutation_rate, mutation_scale, rng)
+
+        self.genomes, self._next = nxt, self.genomes
+        self.fitness[:] = 0
+        timers.lap('evolve', t)
+        return best_fitness
+
+    def _mutate(self, genomes, mutation_rate, mutation_scale, rng):
+        # Mesma regra de RedeNeural.mutate: cada gene muta com chance mutation_rate
+        for start in range(0, len(genomes), len(self._noise)):
+            block = genomes[start:start + len(self._noise)]
+            noise = self._noise[:len(block)]
+            mask = self._mask[:len(block)]
+
+            rng.random(out=noise, dtype=GENOME_DTYPE)
+            np.less(noise, mutation_rate, out=mask)
+            rng.standard_normal(out=noise, dtype=GENOME_DTYPE)
+            noise *= mutation_scale
+            noise *= mask
+            block += noise
@@ -1,21 +1,37 @@
-import pygame
 import config
+import functools
 import math # Necessário para colisão
 
 import random
+import numpy as np
 from player import Player
 from bot import Bot
 from ball import Ball
 from goal import Goal
 from agent import Agent
+from perf import timers
+from arena_state import STATE_DTYPE, ArenaState, check_size, rng_state, rng_from_state
+
+@functools.lru_cache(maxsize=64)
+def _win_overlay(size, color):
+    """Máscara transparente (50%) do tamanho da quadra, criada uma vez por (tamanho, cor)"""
+    import pygame
+    overlay = pygame.Surface(size)
+    overlay.set_alpha(128)
+    overlay.fill(color)
+    return overlay
+
 
 class Quadra:
-    def __init__(self, screen, begin, end, players):
+    def __init__(self, screen, begin, end, players, rng=random):
+        # rng: random.Random da cor, dos IDs e do Bot (padrão: o módulo random)
         self.screen = screen
         self.begin = begin
         self.end = end
         self.pontuou = False
-        self.color = config.Variate_grass_color()
+        self.color = config.Variate_grass_color(rng)
+        # Último frame da partida encerrada (render só cola ele até o próximo reset/restore)
+        self._final_frame = None
 
         # Status 0: Partida Rolando
         # Status 1: Vitoria da Esquerda
@@ -34,6 +50,9 @@ class Quadra:
 
         self.grossura_proporcional = int(self.altura / 100) 
         self.grossura = max(2, min(self.grossura_proporcional, 6))
+
+        # Retângulo da quadra na tela (x, y, largura, altura), usado para blits e dirty rects
+        self.area = (int(self.x_pos), int(self.y_pos), int(self.largura), int(self.altura))
         
         self.players = []
         self.ball = Ball(begin, end, screen, self.players) # Passa lista vazia inicialmente
@@ -45,13 +64,13 @@ class Quadra:
         self.ball.goal_callback = self._on_goal
         
         # Cria os players
-        ID = [random.randint(1000,5000) for i in range(2)]
+        ID = [rng.randint(1000,5000) for i in range(2)]
         if(ID[0] == ID[1]):
-            ID = [random.randint(1000,10000) for i in range(2)]
+            ID = [rng.randint(1000,10000) for i in range(2)]
 
         for i in range(len(players)):
             if(players[i] == 'bot'):
-                individuo = Bot(ID[i], begin, end, i % 2, screen, target=self.ball)
+                individuo = Bot(ID[i], begin, end, i % 2, screen, target=self.ball, rng=rng)
             elif(players[i] == 'player'):
                 individuo = Player(ID[i], begin, end, i % 2, screen) 
             else:
@@ -64,6 +83,77 @@ class Quadra:
         # Atualiza a referência de players na bola (agora que a lista está cheia)
         self.ball.players = self.players
 
+    def reset(self, brains=None):
+        """
+        Recomeça a partida na mesma quadra, reaproveitando bola, traves, jogadores e cor.
+        brains: um cérebro por slot (None mantém o atual; ignorado para quem não é Agent)
+        """
+        self.score = [0, 0]
+        self.status = 0
+        self.pontuou = False
+        self._final_frame = None
+
+        center_x = self.begin[0] + self.largura / 2
+        center_y = self.begin[1] + self.altura / 2
+        self.ball.set_position(center_x, center_y)
+        self.ball.vx = 0
+        self.ball.vy = 0
+
+        for i, p in enumerate(self.players):
+            start_x = (self.begin[0] + p.radius * 4) if p.team == 0 else (self.end[0] - p.radius * 4)
+            p.set_position(start_x, center_y)
+            p.vx = 0
+            p.vy = 0
+            if hasattr(p, 'walking'):
+                p.walking = 0
+            if hasattr(p, 'stuck_timer'):
+                p.stuck_timer = 0
+            if p.type == "AGENT":
+                p.is_leader = False
+                if brains is not None and brains[i] is not None:
+                    p.brain = brains[i]
+
+    def snapshot(self):
+        """ArenaState (uma quadra) com o estado atual da partida, incluindo o sorteio do bot"""
+        record = np.zeros(1, dtype=STATE_DTYPE)[0]
+        record['size'] = (self.largura, self.altura)
+        record['ball'] = (self.ball.x - self.begin[0], self.ball.y - self.begin[1], self.ball.vx, self.ball.vy)
+        for s, p in enumerate(self.players):
+            record['players'][s] = (p.x - self.begin[0], p.y - self.begin[1], p.vx, p.vy)
+            record['walking'][s] = getattr(p, 'walking', 0)
+            record['stuck_timer'][s] = getattr(p, 'stuck_timer', 0)
+        record['score'] = self.score
+        record['status'] = self.status
+        record['pontuou'] = self.pontuou
+        record['last_scorer'] = -1  # a Quadra não guarda quem marcou por último
+
+        bots = [p for p in self.players if p.type == "BOT"]
+        rngs = [rng_state(bots[0].rng)] if bots else None
+        return ArenaState(record, rngs)
+
+    def restore(self, state, k=0):
+        """Coloca a partida no estado k do snapshot (de uma Quadra ou de um ArenaBatch do mesmo tamanho)"""
+        record = state.records[k:k + 1]
+        check_size(record, self.largura, self.altura)
+        record = record[0]
+        self.ball.set_position(float(record['ball'][0] + self.begin[0]), float(record['ball'][1] + self.begin[1]))
+        self.ball.vx = float(record['ball'][2])
+        self.ball.vy = float(record['ball'][3])
+        for s, p in enumerate(self.players):
+            p.set_position(float(record['players'][s, 0] + self.begin[0]), float(record['players'][s, 1] + self.begin[1]))
+            p.vx = float(record['players'][s, 2])
+            p.vy = float(record['players'][s, 3])
+            if hasattr(p, 'walking'):
+                p.walking = float(record['walking'][s])
+            if hasattr(p, 'stuck_timer'):
+                p.stuck_timer = int(record['stuck_timer'][s])
+            if p.type == "BOT" and state.rngs is not None:
+                p.rng = rng_from_state(state.rngs[k])
+        self.score = [int(record['score'][0]), int(record['score'][1])]
+        self.status = int(record['status'])
+        self.pontuou = bool(record['pontuou'])
+        self._final_frame = None
+
     def check_entities_collision(self):
         """Verifica e resolve colisão entre players/bots (Círculo x Círculo)"""
         for i in range(len(self.players)):
@@ -102,53 +192,70 @@ class Quadra:
                         p2.vx *= 0.7
                         p2.vy *= 0.7
 
-    def draw(self):
-        pygame.draw.rect(self.screen, self.color, [self.x_pos, self.y_pos, self.largura, self.altura])
-        pygame.draw.line(self.screen, config.LINE_COLOR, (self.x_pos + self.largura/2, self.y_pos), (self.x_pos + self.largura/2, self.end[1]), self.grossura)
-        pygame.draw.circle(self.screen, config.LINE_COLOR, ( int(self.x_pos + self.largura/2), int(self.y_pos + self.altura/2)), int(self.altura/10), self.grossura)
-
-    def update(self):
-        
-        if self.status == 1 or self.status == 2:
-            # Desenha o campo (grama e linhas)
-            self.draw() 
-            
-            # Desenha os jogadores e a bola onde eles pararam (sem atualizar física)
-            for p in self.players:
-                p.draw()
-            self.ball.draw()
-
-            # --- CRIAÇÃO DA MÁSCARA TRANSPARENTE ---
-            
-            # Cria uma "folha" nova do tamanho da quadra
-            overlay = pygame.Surface((self.largura, self.altura))
-            
-            # Define a transparência: 0 (invisível) até 255 (sólido). 
-            # 128 é 50% transparente. Tente valores entre 80 e 150.
-            overlay.set_alpha(128) 
-            
-            # Escolhe a cor baseada no vencedor
-            color = self.LEFT_WIN_COLOR if self.status == 1 else self.RIGHT_WIN_COLOR
-            
-            # Pinta a folha com a cor
-            overlay.fill(color)
-            
-            # "Cola" (Blit) a folha transparente por cima da quadra na posição correta
-            self.screen.blit(overlay, (self.x_pos, self.y_pos))
-            
+    def step(self):
+        """Avança um tick de física. Não toca em pygame: roda sem tela (headless)."""
+        if self.status != 0:
             return
 
-        self.draw()
-        
-        # 1. Resolve colisões entre jogadores ANTES de desenhar
+        # 1. Resolve colisões entre jogadores
+        t = timers.start()
         self.check_entities_collision()
+        t = timers.lap('collision', t)
         
         # 2. Atualiza a bola (que resolve colisão Bola x Jogador internamente)
         self.ball.update()
+        timers.lap('ball', t)
         
-        # 3. Atualiza jogadores
+        # 3. Atualiza jogadores (o Agent mede obs/rede/movimento por dentro)
         for p in self.players:
-            p.update()
+            if p.type == "AGENT":
+                p.update()
+            else:
+                t = timers.start()
+                p.update()
+                timers.lap('players', t)
+
+    def render(self):
+        """Passo de desenho separado da física: campo, jogadores, bola e máscara de vitória."""
+        # Encerrada, a quadra não muda mais: desenha uma vez e depois só cola o frame guardado
+        if self._final_frame is not None:
+            self.screen.blit(self._final_frame, self.area)
+            return
+
+        # Desenha o campo (grama, linhas, traves e placar)
+        self.draw()
+
+        # Desenha os jogadores e a bola na posição atual
+        self.draw_entities()
+        self.draw_result()
+        if self.status != 0:
+            self._final_frame = self.screen.subsurface(self.area).copy()
+
+    def draw_entities(self, surface=None):
+        """Desenha jogadores e bola; retorna os retângulos que eles ocupam (dirty rects)"""
+        rects = []
+        for e in self.players + [self.ball]:
+            e.draw(surface)
+            # Margem cobre o anel do líder (raio + 4)
+            margin = e.radius + 6
+            rects.append((int(e.x) - margin, int(e.y) - margin, 2 * margin + 1, 2 * margin + 1))
+        return rects
+
+    def draw_result(self, surface=None):
+        """Máscara transparente com a cor do vencedor (só com a partida encerrada)"""
+        if surface is None:
+            surface = self.screen
+
+        if self.status == 1 or self.status == 2:
+            # Cor do vencedor, 50% transparente, por cima da quadra (a Surface é reaproveitada)
+            color = self.LEFT_WIN_COLOR if self.status == 1 else self.RIGHT_WIN_COLOR
+            surface.blit(_win_overlay((int(self.largura), int(self.altura)), color), (self.x_pos, self.y_pos))
+
+    def update(self):
+        # Física sempre; desenho só quando existe tela (screen=None => headless)
+        self.step()
+        if self.screen is not None:
+            self.render()
 
     def _on_goal(self, goal):
         # Incrementa pontuação do time que marcou
@@ -186,23 +293,34 @@ class Quadra:
                 p.vy = 0
 
     def draw(self):
+        self.draw_field()
+        self.draw_score()
+
+    def draw_field(self, surface=None):
+        """Parte estática da quadra: gramado, linhas e traves (dá para pré-renderizar uma vez)"""
+        import pygame
+        if surface is None:
+            surface = self.screen
         # Desenha gramado e linhas base
-        pygame.draw.rect(self.screen, self.color, [self.x_pos, self.y_pos, self.largura, self.altura])
-        pygame.draw.line(self.screen, config.LINE_COLOR, (self.x_pos + self.largura/2, self.y_pos), (self.x_pos + self.largura/2, self.end[1]), self.grossura)
-        pygame.draw.circle(self.screen, config.LINE_COLOR, ( self.x_pos + self.largura/2, self.y_pos + self.altura/2), (self.altura)/10, self.grossura)
+        pygame.draw.rect(surface, self.color, [self.x_pos, self.y_pos, self.largura, self.altura])
+        pygame.draw.line(surface, config.LINE_COLOR, (self.x_pos + self.largura/2, self.y_pos), (self.x_pos + self.largura/2, self.end[1]), self.grossura)
+        pygame.draw.circle(surface, config.LINE_COLOR, ( self.x_pos + self.largura/2, self.y_pos + self.altura/2), (self.altura)/10, self.grossura)
 
         # Desenha traves
         for g in self.goals:
-            g.draw()
+            g.draw(surface)
 
-        # Desenha placar com tamanho proporcional à altura da quadra
+    def draw_score(self, surface=None):
+        from text_cache import render_text
+        if surface is None:
+            surface = self.screen
+        # Desenha placar com tamanho proporcional à altura da quadra (fonte e dígitos ficam em cache)
         font_size = max(12, int(self.altura * 0.8))
-        font = pygame.font.SysFont(None, font_size)
         
         # Time 0 (esquerda)
-        score_0 = font.render(str(self.score[0]), True, config.LINE_COLOR)
-        self.screen.blit(score_0, (self.x_pos + self.largura/4 - score_0.get_width()/2, self.y_pos + self.altura/2 - score_0.get_height()/2))
+        score_0 = render_text(str(self.score[0]), None, font_size, config.LINE_COLOR)
+        surface.blit(score_0, (self.x_pos + self.largura/4 - score_0.get_width()/2, self.y_pos + self.altura/2 - score_0.get_height()/2))
         
         # Time 1 (direita)
-        score_1 = font.render(str(self.score[1]), True, config.LINE_COLOR)
-        self.screen.blit(score_1, (self.x_pos + 3*self.largura/4 - score_1.get_width()/2, self.y_pos + self.altura/2 - score_1.get_height()/2))
\ No newline at end of file
+        score_1 = render_text(str(self.score[1]), None, font_size, config.LINE_COLOR)
+        surface.blit(score_1, (self.x_pos + 3*self.largura/4 - score_1.get_width()/2, self.y_pos + self.altura/2 - score_1.get_height()/2))
\ No newline at end of file
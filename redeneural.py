@@ -1,12 +1,33 @@
+import hashlib
 import numpy as np
 import config
+from seeds import default_generator, NETWORK
+
+# Genoma: todos os pesos e viéses da rede em um único vetor float32 contíguo,
+# camada a camada [W0, b0, W1, b1, ...]. As matrizes da rede são views dele.
+GENOME_DTYPE = np.float32
+
+def genome_layout(input_size, hidden_sizes, output_size):
+    """Lista de (offset, shape_W, offset_b, tamanho_b) de cada camada e o tamanho total do genoma"""
+    layout = []
+    offset = 0
+    prev_size = input_size
+    for size in list(hidden_sizes) + [output_size]:
+        w_offset = offset
+        offset += prev_size * size
+        layout.append((w_offset, (prev_size, size), offset, size))
+        offset += size
+        prev_size = size
+    return layout, offset
 
 class RedeNeural:
-    def __init__(self, input_size=config.INPUT_SIZE_LAYER, hidden_size=config.HIDDEN_SIZE_LAYER, output_size=2):
+    def __init__(self, input_size=config.INPUT_SIZE_LAYER, hidden_size=config.HIDDEN_SIZE_LAYER, output_size=2, genome=None, rng=None):
         """
         input_size: Quantidade de dados de entrada
         hidden_size: Pode ser um int (ex: 12) ou uma lista (ex: [12, 8, 6]) definindo várias camadas
         output_size: 2 (ax, ay)
+        genome: vetor de pesos já pronto (ex: cópia ou arquivo); None sorteia pesos novos
+        rng: np.random.Generator dos pesos novos e de mutate (None => default_generator(NETWORK))
         """
         self.input_size = input_size
         self.output_size = output_size
@@ -15,36 +36,42 @@ class RedeNeural:
         if isinstance(hidden_size, int):
             self.hidden_sizes = [hidden_size]
         else:
-            self.hidden_sizes = hidden_size
+            self.hidden_sizes = list(hidden_size)
 
-        # Inicializa listas para armazenar Pesos (W) e Viéses (b) de todas as camadas
-        self.weights = []
-        self.biases = []
+        _, genome_size = genome_layout(self.input_size, self.hidden_sizes, self.output_size)
 
-        # --- Construção Dinâmica das Camadas ---
-        
-        # 1. Camada de Entrada -> Primeira Camada Oculta
-        prev_size = self.input_size
-        
-        # Cria as camadas ocultas baseadas na lista
-        for size in self.hidden_sizes:
-            # Pesos: (tamanho_anterior, tamanho_atual)
-            W = np.random.randn(prev_size, size)
-            b = np.zeros((1, size))
-            
-            self.weights.append(W)
-            self.biases.append(b)
-            prev_size = size
-            
-        # 2. Última Camada Oculta -> Saída
-        W_out = np.random.randn(prev_size, self.output_size)
-        b_out = np.zeros((1, self.output_size))
-        
-        self.weights.append(W_out)
-        self.biases.append(b_out)
+        # Rede com genoma pronto só cria o gerador se alguém chamar mutate
+        self.rng = rng
+        if genome is None:
+            # Pesos ~ N(0, 1) e viéses zerados, camada a camada
+            self.genome = np.zeros(genome_size, dtype=GENOME_DTYPE)
+            self._bind_views()
+            rng = self._rng()
+            for W in self.weights:
+                W[...] = rng.standard_normal(W.shape)
+        else:
+            genome = np.ascontiguousarray(genome, dtype=GENOME_DTYPE)
+            if genome.shape != (genome_size,):
+                raise ValueError(f"Genoma com {genome.size} valores, a arquitetura pede {genome_size}")
+            self.genome = genome
+            self._bind_views()
 
         self.last_activations = []
 
+    def _bind_views(self):
+        """Pesos (W) e Viéses (b) de cada camada como views do genoma"""
+        layout, _ = genome_layout(self.input_size, self.hidden_sizes, self.output_size)
+        self.weights = []
+        self.biases = []
+        for w_offset, shape, b_offset, size in layout:
+            self.weights.append(self.genome[w_offset:w_offset + shape[0] * shape[1]].reshape(shape))
+            self.biases.append(self.genome[b_offset:b_offset + size].reshape(1, size))
+
+    def _rng(self):
+        if self.rng is None:
+            self.rng = default_generator(NETWORK)
+        return self.rng
+
     def tanh(self, x):
         return np.tanh(x)
 
@@ -66,30 +93,159 @@ class RedeNeural:
 
         return current_activation[0]
 
-    def mutate(self, mutation_rate=0.1, mutation_scale=0.2):
+    def mutate(self, mutation_rate=0.1, mutation_scale=0.2, rng=None):
         """
-        Aplica mutação em todas as matrizes de peso e viés da lista
+        Aplica mutação no genoma inteiro de uma vez (todas as camadas)
+        rng: np.random.Generator dos sorteios; None => self.rng
         """
-        def mutate_matrix(matrix):
-            mask = np.random.rand(*matrix.shape) < mutation_rate
-            noise = np.random.randn(*matrix.shape) * mutation_scale
-            matrix[mask] += noise[mask]
-            return matrix
-
-        # Aplica mutação em cada camada armazenada nas listas
-        for i in range(len(self.weights)):
-            self.weights[i] = mutate_matrix(self.weights[i])
-            self.biases[i] = mutate_matrix(self.biases[i])
+        rng = self._rng() if rng is None else rng
+        mask = rng.random(self.genome.size) < mutation_rate
+        noise = rng.standard_normal(self.genome.size) * mutation_scale
+        self.genome[mask] += noise[mask]
 
     def copy(self):
         """
-        Cria uma cópia exata, suportando a estrutura dinâmica
+        Cria uma cópia exata (uma cópia do genoma, sem sortear pesos descartáveis)
         """
-        # Cria nova rede com a mesma estrutura de camadas
-        nova_rede = RedeNeural(self.input_size, self.hidden_sizes, self.output_size)
-        
-        # Copia profundamente as listas de pesos e viéses
-        nova_rede.weights = [w.copy() for w in self.weights]
-        nova_rede.biases = [b.copy() for b in self.biases]
-        
-        return nova_rede
\ No newline at end of file
+        # A cópia divide o gerador do original: as duas não repetem as mesmas mutações
+        return RedeNeural(self.input_size, self.hidden_sizes, self.output_size, genome=self.genome.copy(), rng=self.rng)
+
+    def fingerprint(self):
+        """Hash do genoma: redes com os mesmos pesos têm o mesmo fingerprint"""
+        return hashlib.blake2b(self.genome.tobytes(), digest_size=16).hexdigest()
+
+    def __getstate__(self):
+        # Serializa só a arquitetura e o genoma (as views são refeitas no load)
+        return {
+            'input_size': self.input_size,
+            'hidden_sizes': self.hidden_sizes,
+            'output_size': self.output_size,
+            'genome': self.genome,
+        }
+
+    def __setstate__(self, state):
+        self.input_size = state['input_size']
+        self.hidden_sizes = list(state['hidden_sizes'])
+        self.output_size = state['output_size']
+        if 'genome' in state:
+            genome = state['genome']
+        else:
+            # Modelos antigos (.pkl com listas de matrizes float64)
+            genome = np.concatenate([np.concatenate([W.ravel(), b.ravel()]) for W, b in zip(state['weights'], state['biases'])])
+        self.genome = np.ascontiguousarray(genome, dtype=GENOME_DTYPE)
+        self._bind_views()
+        self.last_activations = []
+
+class RedeNeuralLote:
+    def __init__(self, redes):
+        """
+        Empilha os pesos de várias RedeNeural (mesma arquitetura) em tensores 3-D
+        para avaliar a população inteira com uma multiplicação por camada.
+        Os genomas são copiados: se as redes mudarem (mutação), crie um novo lote.
+        """
+        if not redes:
+            raise ValueError("RedeNeuralLote precisa de pelo menos uma rede")
+
+        base = redes[0]
+        self.input_size = base.input_size
+        self.hidden_sizes = list(base.hidden_sizes)
+        self.output_size = base.output_size
+        for r in redes:
+            if r.input_size != self.input_size or list(r.hidden_sizes) != self.hidden_sizes or r.output_size != self.output_size:
+                raise ValueError("Todas as redes do lote precisam ter a mesma arquitetura")
+
+        self._bind(np.stack([r.genome for r in redes]))
+
+        # Ativações da última chamada, uma matriz (linhas, neurônios) por camada
+        self.last_activations = []
+        self.last_idx = None
+
+    @classmethod
+    def from_genomes(cls, genomes, input_size=config.INPUT_SIZE_LAYER, hidden_size=config.HIDDEN_SIZE_LAYER, output_size=2):
+        """Lote direto de uma matriz (P, G) de genomas (ex: Populacao), sem copiar os pesos"""
+        lote = cls.__new__(cls)
+        lote.input_size = input_size
+        lote.hidden_sizes = [hidden_size] if isinstance(hidden_size, int) else list(hidden_size)
+        lote.output_size = output_size
+        lote._bind(genomes)
+        lote.last_activations = []
+        lote.last_idx = None
+        return lote
+
+    def _bind(self, genomes):
+        """Pesos e viéses de cada camada como views da matriz de genomas"""
+        layout, genome_size = genome_layout(self.input_size, self.hidden_sizes, self.output_size)
+        genomes = np.asarray(genomes, dtype=GENOME_DTYPE)
+        if genomes.ndim != 2 or genomes.shape[1] != genome_size:
+            raise ValueError(f"Genomas {genomes.shape}, a arquitetura pede (P, {genome_size})")
+
+        # Genomas empilhados (P, G)
+        # Pesos: (P, tamanho_anterior, tamanho_atual) | Viéses: (P, 1, tamanho_atual)
+        self.genomes = genomes
+        self.size = len(genomes)
+        self.weights = []
+        self.biases = []
+        for w_offset, shape, b_offset, size in layout:
+            self.weights.append(genomes[:, w_offset:w_offset + shape[0] * shape[1]].reshape(self.size, *shape))
+            self.biases.append(genomes[:, b_offset:b_offset + size].reshape(self.size, 1, size))
+
+    def subset(self, idx):
+        """Lote só com as redes idx (na ordem dada)"""
+        return RedeNeuralLote.from_genomes(self.genomes[idx], self.input_size, self.hidden_sizes, self.output_size)
+
+    @classmethod
+    def concat(cls, lotes):
+        """Um lote com as redes de vários lotes (ou listas de RedeNeural), na ordem dada"""
+        lotes = [l if isinstance(l, RedeNeuralLote) else RedeNeuralLote(list(l)) for l in lotes]
+        base = lotes[0]
+        return cls.from_genomes(np.concatenate([l.genomes for l in lotes]), base.input_size, base.hidden_sizes, base.output_size)
+
+    def rede(self, i):
+        """RedeNeural da posição i (o genoma é uma view do lote)"""
+        return RedeNeural(self.input_size, self.hidden_sizes, self.output_size, genome=self.genomes[i])
+
+    def __getstate__(self):
+        # Só a arquitetura e os genomas (ex: ao enviar para outro processo)
+        return {
+            'input_size': self.input_size,
+            'hidden_sizes': self.hidden_sizes,
+            'output_size': self.output_size,
+            'genomes': self.genomes,
+        }
+
+    def __setstate__(self, state):
+        self.input_size = state['input_size']
+        self.hidden_sizes = state['hidden_sizes']
+        self.output_size = state['output_size']
+        self._bind(state['genomes'])
+        self.last_activations = []
+        self.last_idx = None
+
+    def feedForward(self, inputs, idx=None):
+        """
+        inputs: (linhas, input_size). Sem idx, a linha i vai para a rede i;
+        com idx, a linha k vai para a rede idx[k].
+        Retorna (linhas, output_size), igual a chamar feedForward rede a rede.
+        """
+        current_activation = np.asarray(inputs, dtype=np.float64)[:, None, :]
+        self.last_activations = [current_activation[:, 0]]
+        self.last_idx = idx
+
+        for W, b in zip(self.weights, self.biases):
+            if idx is not None:
+                W = W[idx]
+                b = b[idx]
+            current_activation = np.tanh(np.matmul(current_activation, W) + b)
+            self.last_activations.append(current_activation[:, 0])
+
+        return current_activation[:, 0]
+
+    def activations_of(self, rede_idx):
+        """Ativações da última chamada para uma rede (formato de RedeNeural.last_activations)"""
+        row = rede_idx
+        if self.last_idx is not None:
+            rows = np.flatnonzero(np.asarray(self.last_idx) == rede_idx)
+            if rows.size == 0:
+                return []
+            row = rows[0]
+        return [layer[row] for layer in self.last_activations]
@@ -0,0 +1,298 @@
+import json
+import os
+import struct
+import sys
+import numpy as np
+
+import config
+from evaluator import MODES, arena_geometry, run_matches
+
+# ========================
+# GRAVAÇÃO DE PARTIDAS (.replay)
+# ========================
+# Estado por tick de algumas quadras em registros de tamanho fixo, num arquivo que o
+# visualizador abre com np.memmap: dá para rever qualquer trecho de uma partida longa
+# sem carregar o arquivo inteiro nem simular de novo.
+#
+#   0  magic   b"RPLY"
+#   4  versão  uint16
+#   6  (reservado) uint16
+#   8  tamanho do JSON  uint32
+#   12 offset dos registros uint32
+#   16 JSON (utf-8): mode, players, arenas, arena_width/height, ticks_per_second, record_size, meta
+#   .. registros RECORD_DTYPE, tick a tick: (ticks, quadras)
+#
+# A gravação junta RECORD_FLUSH_TICKS ticks num buffer e escreve de uma vez.
+# Coordenadas na arena canônica (config.ARENA_WIDTH x ARENA_HEIGHT).
+
+MAGIC = b"RPLY"
+VERSION = 1
+REPLAY_EXT = ".replay"
+_FIXED = struct.Struct("<4sHHII")
+_ALIGN = 64
+
+# Bits de 'events'
+GOAL_LEFT = 1    # gol do time 0 (esquerda) neste tick
+GOAL_RIGHT = 2   # gol do time 1 (direita) neste tick
+
+RECORD_DTYPE = np.dtype([
+    ('tick', '<u4'),
+    ('ball', '<f4', (4,)),         # x, y, vx, vy
+    ('players', '<f4', (2, 4)),    # por slot: x, y, vx, vy
+    ('actions', '<f4', (2, 2)),    # por slot: aceleração (ax, ay) escolhida pela rede ou pelo bot
+    ('score', 'u1', (2,)),
+    ('status', 'u1'),
+    ('events', 'u1'),
+])
+
+
+class MatchRecorder:
+    def __init__(self, path, mode, arenas, meta=None, flush_every=None):
+        """
+        Grava o estado das quadras de um ArenaBatch a cada capture().
+        arenas: índices originais das quadras gravadas (só registro, para achar a partida depois)
+        """
+        self.path = path
+        self.n = len(arenas)
+        self.flush_every = flush_every or config.RECORD_FLUSH_TICKS
+        self._buffer = np.zeros((self.flush_every, self.n), dtype=RECORD_DTYPE)
+        self._pending = 0
+        self._score = np.zeros((self.n, 2), dtype=np.int64)
+
+        header = {
+            'mode': mode,
+            'players': list(MODES[mode][0]),
+            'arenas': [int(a) for a in arenas],
+            'arena_width': config.ARENA_WIDTH,
+            'arena_height': config.ARENA_HEIGHT,
+            'ticks_per_second': config.TICKS_PER_SECOND,
+            'record_size': RECORD_DTYPE.itemsize,
+            'meta': meta or {},
+        }
+        header_bytes = json.dumps(header).encode('utf-8')
+        data_offset = -(-(_FIXED.size + len(header_bytes)) // _ALIGN) * _ALIGN
+
+        self._file = open(path, 'wb')
+        self._file.write(_FIXED.pack(MAGIC, VERSION, 0, len(header_bytes), data_offset))
+        self._file.write(header_bytes)
+        self._file.write(b"\0" * (data_offset - _FIXED.size - len(header_bytes)))
+
+    def capture(self, batch, tick):
+        """Guarda o tick atual de todas as quadras do lote (o lote tem só as quadras gravadas)"""
+        rec = self._buffer[self._pending]
+        rec['tick'] = tick
+        rec['ball'] = np.stack([batch.ball_x, batch.ball_y, batch.ball_vx, batch.ball_vy], axis=1)
+        rec['players'] = np.stack([batch.px, batch.py, batch.pvx, batch.pvy], axis=2)
+        rec['actions'] = batch.actions
+        rec['score'] = batch.score
+        rec['status'] = batch.status
+        # Gol = placar mudou desde o último tick (batch.pontuou já foi consumido pela recompensa)
+        goals = batch.score > self._score
+        rec['events'] = goals[:, 0] * GOAL_LEFT | goals[:, 1] * GOAL_RIGHT
+        self._score[:] = batch.score
+
+        self._pending += 1
+        if self._pending == self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._buffer[:self._pending].tobytes())
+            self._pending = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def read_header(path):
+    """Cabeçalho de um .replay; inclui 'data_offset' e 'ticks' (ticks completos gravados)"""
+    with open(path, 'rb') as f:
+        fixed = f.read(_FIXED.size)
+        if len(fixed) < _FIXED.size:
+            raise ValueError(f"{path}: arquivo curto demais para um replay")
+        magic, version, _, header_size, data_offset = _FIXED.unpack(fixed)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: não é um replay")
+        if version > VERSION:
+            raise ValueError(f"{path}: versão {version} do formato não suportada (máx {VERSION})")
+        header = json.loads(f.read(header_size).decode('utf-8'))
+
+    if header['record_size'] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path}: registros de {header['record_size']} bytes, esperava {RECORD_DTYPE.itemsize}")
+    tick_size = RECORD_DTYPE.itemsize * len(header['arenas'])
+    header['version'] = version
+    header['data_offset'] = data_offset
+    # Uma gravação interrompida pode terminar no meio de um tick: só conta os completos
+    header['ticks'] = max(0, os.path.getsize(path) - data_offset) // tick_size
+    return header
+
+
+def load_replay(path):
+    """(cabeçalho, registros) com os registros mapeados do arquivo: array (ticks, quadras), somente leitura"""
+    header = read_header(path)
+    if header['ticks'] == 0:
+        return header, np.zeros((0, len(header['arenas'])), dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=header['data_offset'],
+                        shape=(header['ticks'], len(header['arenas'])))
+    return header, records
+
+
+def record_matches(path, mode, brains, ticks, seeds, arenas, meta=None):
+    """
+    Grava as partidas de uma rodada já avaliada simulando de novo só as quadras escolhidas:
+    com a mesma semente e os mesmos cérebros cada quadra refaz a partida exatamente.
+    brains, seeds: os da rodada inteira (RedeNeuralLote ou None por slot)
+    """
+    arenas = np.asarray(arenas)
+    sub_brains = [None if b is None else b.subset(arenas) for b in brains]
+    sub_seeds = None if seeds is None else [seeds[a] for a in arenas]
+    begin, end = arena_geometry(len(arenas))
+
+    recorder = MatchRecorder(path, mode, arenas, meta)
+    try:
+        run_matches(mode, sub_brains, ticks, begin, end, sub_seeds,
+                    lambda batch, fitness, goals, tick: recorder.capture(batch, tick))
+    finally:
+        recorder.close()
+    return path
+
+
+def record_best(name, generation, match_round, mode, brains, ticks, seeds, fitness):
+    """
+    Grava as config.RECORD_BEST quadras de maior fitness da rodada em
+    replays/<name>_gen<G>_r<R>.replay e retorna o caminho.
+    """
+    players = MODES[mode][0]
+    agents = [s for s in range(2) if players[s] == 'agent']
+    best = np.argsort(-fitness[:, agents].max(axis=1), kind='stable')[:config.RECORD_BEST]
+
+    os.makedirs(config.REPLAY_DIR, exist_ok=True)
+    path = os.path.join(config.REPLAY_DIR, f"{name}_gen{generation}_r{match_round}{REPLAY_EXT}")
+    meta = {'generation': generation, 'round': match_round,
+            'fitness': [[float(f) for f in fitness[a]] for a in best]}
+    record_matches(path, mode, brains, ticks, seeds, best, meta)
+    print(f"🎥 Replay das quadras {[int(a) + 1 for a in best]}: {path}")
+    return path
+
+
+# ========================
+# VISUALIZADOR
+# ========================
+# python replay.py replays/arquivo.replay [--arena=K] [--from=T] [--to=T]
+# Espaço pausa, ←/→ andam um tick (pausado), ↑/↓ mudam a velocidade,
+# N/P trocam de quadra, Esc/Q saem.
+
+def _place(q, rec, scale, origin):
+    # Registro (arena canônica) -> entidades da Quadra ampliada
+    sx, sy = scale
+    ox, oy = origin
+    q.ball.x = float(rec['ball'][0]) * sx + ox
+    q.ball.y = float(rec['ball'][1]) * sy + oy
+    for s, p in enumerate(q.players):
+        p.x = float(rec['players'][s, 0]) * sx + ox
+        p.y = float(rec['players'][s, 1]) * sy + oy
+    q.score = [int(rec['score'][0]), int(rec['score'][1])]
+    q.status = int(rec['status'])
+
+
+def view(path, arena=0, first=0, last=None, max_frames=None):
+    import pygame
+    from quadra import Quadra
+    import text_cache
+
+    header, records = load_replay(path)
+    n_ticks, n_arenas = records.shape
+    if n_ticks == 0:
+        print(f"{path}: nenhum tick gravado")
+        return
+    last = n_ticks if last is None else min(last, n_ticks)
+    first = max(0, min(first, last - 1))
+    arena = arena % n_arenas
+
+    pygame.init()
+    w = header['arena_width']
+    h = header['arena_height']
+    k = config.GAME_WIDTH / w
+    hud_height = 40
+    screen = pygame.display.set_mode((config.GAME_WIDTH, int(h * k) + hud_height))
+    q = Quadra(screen, (0, hud_height), (int(w * k), hud_height + int(h * k)), header['players'])
+    scale = (q.largura / w, q.altura / h)
+    origin = (q.begin[0], q.begin[1])
+
+    field = pygame.Surface(screen.get_size())
+    field.fill(config.BG_COLOR)
+    q.draw_field(field)
+
+    clock = pygame.time.Clock()
+    t = first
+    speed = 1
+    paused = False
+    frames = 0
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN:
+                if event.key in (pygame.K_ESCAPE, pygame.K_q):
+                    running = False
+                elif event.key == pygame.K_SPACE:
+                    paused = not paused
+                elif event.key == pygame.K_RIGHT:
+                    t = min(t + 1, last - 1)
+                elif event.key == pygame.K_LEFT:
+                    t = max(t - 1, first)
+                elif event.key == pygame.K_UP:
+                    speed = min(speed * 2, 64)
+                elif event.key == pygame.K_DOWN:
+                    speed = max(speed // 2, 1)
+                elif event.key == pygame.K_n:
+                    arena = (arena + 1) % n_arenas
+                elif event.key == pygame.K_p:
+                    arena = (arena - 1) % n_arenas
+
+        rec = records[t, arena]
+        _place(q, rec, scale, origin)
+
+        screen.blit(field, (0, 0))
+        q.draw_score(screen)
+        q.draw_entities(screen)
+        # Ação de cada jogador: segmento na direção da aceleração escolhida
+        for s, p in enumerate(q.players):
+            ax, ay = rec['actions'][s]
+            pygame.draw.line(screen, config.TEXT_COLOR, (p.x, p.y),
+                             (p.x + float(ax) * p.radius * 2, p.y + float(ay) * p.radius * 2), 2)
+        q.draw_result(screen)
+
+        info = (f"Quadra {header['arenas'][arena] + 1} ({arena + 1}/{n_arenas}) | "
+                f"tick {int(rec['tick'])} ({t + 1}/{last}) | {speed}x" + (" | PAUSA" if paused else ""))
+        screen.blit(text_cache.render_text(info, None, 28, config.TEXT_COLOR), (10, 10))
+        if rec['events']:
+            goal = text_cache.render_text("GOL!", None, 28, config.BEST_COLOR, True)
+            screen.blit(goal, (config.GAME_WIDTH - goal.get_width() - 10, 10))
+        pygame.display.flip()
+
+        if not paused:
+            t = min(t + speed, last - 1)
+        clock.tick(header['ticks_per_second'])
+        frames += 1
+        if max_frames is not None and frames >= max_frames:
+            running = False
+
+    pygame.quit()
+    text_cache.clear()
+
+
+if __name__ == "__main__":
+    files = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if not files:
+        print("Uso: python replay.py arquivo.replay [--arena=K] [--from=T] [--to=T]")
+        sys.exit(1)
+    to = config._arg_value("to", None)
+    view(files[0],
+         arena=int(config._arg_value("arena", 1)) - 1,
+         first=int(config._arg_value("from", 0)),
+         last=None if to is None else int(to))
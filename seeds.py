@@ -0,0 +1,60 @@
+import numpy as np
+
+# ========================
+# STREAMS DE SORTEIO DO TREINO
+# ========================
+# Nada de random/np.random globais no treino: cada sorteio sai de um stream derivado
+# da semente do run (SeedSequence) por uma chave fixa, ex: (PAIRING, geração, rodada).
+# O stream de uma chave não depende de quantos outros foram usados antes, nem em que
+# ordem, nem em qual processo: a mesma semente refaz o mesmo treino e qualquer partida
+# pode ser repetida sozinha a partir de (geração, rodada, quadra).
+#
+#   streams = SeedStreams(config.SEED)          # None => semente nova (veja streams.entropy)
+#   pop = Populacao(n, rng=streams.population(0))
+#   seeds = streams.match_seeds(generation, match_round, n)
+#   pop.evolve(..., rng=streams.evolution(0, generation))
+
+# Finalidade de cada stream (primeiro elemento da chave)
+POPULATION = 0   # pesos iniciais da população k
+EVOLUTION = 1    # seleção e mutação da população k em uma geração
+PAIRING = 2      # embaralhamento dos pareamentos de uma rodada
+MATCH = 3        # sementes das partidas (uma por quadra) de uma rodada
+NETWORK = 4      # pesos e mutação de redes avulsas (fora de uma Populacao)
+
+# Semente de quem não recebeu um rng (ex: Populacao(n), RedeNeural()): sorteios
+# fixos e repetíveis em vez do np.random global
+DEFAULT_SEED = 0
+
+
+class SeedStreams:
+    def __init__(self, seed=None):
+        """seed: inteiro da semente do run (None => entropia do sistema, guardada em self.entropy)"""
+        self.entropy = np.random.SeedSequence(seed).entropy
+
+    def sequence(self, *key):
+        """SeedSequence da chave (mesma semente + mesma chave => mesmos sorteios)"""
+        return np.random.SeedSequence(self.entropy, spawn_key=key)
+
+    def generator(self, *key):
+        return np.random.Generator(np.random.PCG64(self.sequence(*key)))
+
+    def population(self, k):
+        return self.generator(POPULATION, k)
+
+    def evolution(self, k, generation):
+        return self.generator(EVOLUTION, k, generation)
+
+    def pairing(self, generation, match_round):
+        return self.generator(PAIRING, generation, match_round)
+
+    def match_seeds(self, generation, match_round, n):
+        """
+        Semente de cada uma das n partidas da rodada: a da quadra i não depende de n
+        nem de como as partidas são divididas entre workers
+        """
+        return self.sequence(MATCH, generation, match_round).generate_state(n).tolist()
+
+
+def default_generator(*key):
+    """Generator da chave na semente DEFAULT_SEED, para quem não recebeu um rng"""
+    return SeedStreams(DEFAULT_SEED).generator(*key)
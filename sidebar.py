@@ -1,11 +1,64 @@
 import pygame
-import matplotlib
-import matplotlib.pyplot as plt
-import io
 import numpy as np
+from text_cache import render_text
+
+# Gráfico do fitness: no máximo PLOT_BUCKETS pontos, não importa quantas gerações
+PLOT_BUCKETS = 256
+PLOT_HEIGHT = 240
+PLOT_BG = (45, 45, 45)
+PLOT_AREA_BG = (30, 30, 30)
+PLOT_GRID = (68, 68, 68)
+PLOT_BORDER = (85, 85, 85)
+PLOT_LINE = (0, 255, 255)
+PLOT_BAND = (0, 90, 90)
+PLOT_LABEL = (187, 187, 187)
+
+
+class FitnessBuckets:
+    def __init__(self, max_buckets=PLOT_BUCKETS):
+        """
+        Histórico reduzido a no máximo max_buckets baldes (mín, máx, média) de 'width' gerações.
+        Ao encher, junta os baldes de dois em dois e dobra 'width': append é O(1) amortizado
+        e o gráfico desenha sempre no máximo max_buckets pontos.
+        """
+        self.max_buckets = max_buckets
+        self.clear()
+
+    def clear(self):
+        self.width = 1
+        self.count = 0
+        self.mins = []
+        self.maxs = []
+        self.sums = []
+        self.counts = []
+
+    def append(self, value):
+        self.count += 1
+        if self.counts and self.counts[-1] < self.width:
+            self.mins[-1] = min(self.mins[-1], value)
+            self.maxs[-1] = max(self.maxs[-1], value)
+            self.sums[-1] += value
+            self.counts[-1] += 1
+            return
+        if len(self.counts) == self.max_buckets:
+            self._halve()
+        self.mins.append(value)
+        self.maxs.append(value)
+        self.sums.append(value)
+        self.counts.append(1)
+
+    def _halve(self):
+        # Todos os baldes estão cheios aqui: cada par vira um balde de 2*width gerações
+        pairs = range(0, len(self.counts), 2)
+        self.mins = [min(self.mins[i:i + 2]) for i in pairs]
+        self.maxs = [max(self.maxs[i:i + 2]) for i in pairs]
+        self.sums = [sum(self.sums[i:i + 2]) for i in pairs]
+        self.counts = [sum(self.counts[i:i + 2]) for i in pairs]
+        self.width *= 2
+
+    def means(self):
+        return [total / n for total, n in zip(self.sums, self.counts)]
 
-# Configura backend não-interativo
-matplotlib.use("Agg")
 
 class Sidebar:
     def __init__(self, screen, x_start, width, height):
@@ -14,56 +67,107 @@ class Sidebar:
         self.width = width
         self.height = height
         
-        self.font_title = pygame.font.SysFont("Arial", 22, bold=True)
-        self.font_text = pygame.font.SysFont("Consolas", 14)
-        self.font_tiny = pygame.font.SysFont("Arial", 11)
+        # (nome, tamanho, negrito) das fontes: fontes e textos renderizados ficam em cache
+        self.font_title = ("Arial", 22, True)
+        self.font_text = ("Consolas", 14, False)
+        self.font_tiny = ("Arial", 11, False)
         
         self.margin_x = 20
         self.net_y_start = 420 
 
+        # Cache da camada de conexões da rede desenhada (chave: fingerprint dos pesos + área)
+        self._net_key = None
+        self._net_layer = None
+        self._net_offset = None
+        self._net_nodes = None
+
         # --- MODIFICAÇÃO: Histórico apenas em memória (RAM) ---
         # Não carrega mais de arquivo. Começa limpo a cada execução.
         self.fitness_history = [] 
         
-        self.cached_graph_surface = None
+        # Gráfico desenhado direto numa surface persistente (sem matplotlib)
+        self.plot_buckets = FitnessBuckets()
+        self.cached_graph_surface = pygame.Surface((self.width - 40, PLOT_HEIGHT))
         self.update_graph_surface()
 
     def update_history(self, best_fitness):
         # Apenas adiciona na lista local
         self.fitness_history.append(float(best_fitness))
+        self.plot_buckets.append(float(best_fitness))
         
         # Regenera o gráfico visual
         self.update_graph_surface()
 
+    def load_history(self, history):
+        # Histórico salvo (ex: checkpoint), uma entrada por geração
+        self.fitness_history = [float(v) for v in history]
+        self.plot_buckets.clear()
+        for v in self.fitness_history:
+            self.plot_buckets.append(v)
+        self.update_graph_surface()
+
     def update_graph_surface(self):
-        dpi = 100
-        w_inch = (self.width - 40) / dpi
-        h_inch = 2.4 
-        
-        fig, ax = plt.subplots(figsize=(w_inch, h_inch), dpi=dpi)
-        fig.patch.set_facecolor('#2D2D2D')
-        ax.set_facecolor('#1E1E1E')
-        
-        data = self.fitness_history
-        if not data: data = [0]
-        iterations = range(1, len(data) + 1)
-        
-        ax.plot(iterations, data, color='#00FFFF', linewidth=2, marker='o', markersize=3)
-        ax.fill_between(iterations, data, color='#00FFFF', alpha=0.15)
-        ax.grid(True, color='#444444', linestyle='--', linewidth=0.5, alpha=0.7)
-        ax.tick_params(axis='both', colors='#BBBBBB', labelsize=8)
-        
-        for spine in ax.spines.values():
-            spine.set_edgecolor('#555555')
-            
-        ax.set_title("Evolução do Fitness (Média)", color='white', fontsize=9, pad=5)
-
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight', pad_inches=0.1)
-        buf.seek(0)
-        self.cached_graph_surface = pygame.image.load(buf)
-        plt.close(fig)
-        buf.close()
+        """Redesenha o gráfico na surface persistente a partir dos baldes (custo constante)"""
+        surf = self.cached_graph_surface
+        w, h = surf.get_size()
+        surf.fill(PLOT_BG)
+
+        name, size, bold = self.font_tiny
+        title = render_text("Evolução do Fitness (Média)", name, size, (255, 255, 255), bold)
+        surf.blit(title, ((w - title.get_width()) // 2, 5))
+
+        # Área do gráfico (margem à esquerda para os valores do eixo Y)
+        area = pygame.Rect(55, 25, w - 80, h - 50)
+        pygame.draw.rect(surf, PLOT_AREA_BG, area)
+
+        buckets = self.plot_buckets
+        if buckets.count == 0:
+            low, high = -1.0, 1.0
+        else:
+            low, high = min(buckets.mins), max(buckets.maxs)
+            pad = (high - low) * 0.05 if high > low else max(abs(high) * 0.05, 0.05)
+            low, high = low - pad, high + pad
+        first = 1
+        last = max(buckets.count, 2)
+
+        def to_x(generation):
+            return area.left + (generation - first) / (last - first) * area.width
+
+        def to_y(value):
+            return area.bottom - (value - low) / (high - low) * area.height
+
+        # Grade e valores dos eixos
+        for k in range(5):
+            value = low + (high - low) * k / 4
+            y = int(to_y(value))
+            pygame.draw.line(surf, PLOT_GRID, (area.left, y), (area.right, y))
+            label = render_text(f"{value:.2f}", name, size, PLOT_LABEL, bold)
+            surf.blit(label, (area.left - label.get_width() - 5, y - label.get_height() // 2))
+        for generation in sorted({round(first + (last - first) * k / 4) for k in range(5)}):
+            x = int(to_x(generation))
+            pygame.draw.line(surf, PLOT_GRID, (x, area.top), (x, area.bottom))
+            label = render_text(str(generation), name, size, PLOT_LABEL, bold)
+            surf.blit(label, (x - label.get_width() // 2, area.bottom + 4))
+
+        if buckets.count:
+            # Cada balde no centro das gerações que ele cobre
+            centers = [first + (i + 0.5) * buckets.width - 0.5 for i in range(len(buckets.counts))]
+            centers[-1] = first + (buckets.count - buckets.counts[-1] / 2) - 0.5
+            points = [(to_x(g), to_y(v)) for g, v in zip(centers, buckets.means())]
+
+            # Faixa mín-máx de cada balde (só aparece quando o histórico já foi reduzido)
+            if buckets.width > 1:
+                for g, lo, hi in zip(centers, buckets.mins, buckets.maxs):
+                    x = int(to_x(g))
+                    pygame.draw.line(surf, PLOT_BAND, (x, int(to_y(lo))), (x, int(to_y(hi))))
+
+            if len(points) > 1:
+                pygame.draw.lines(surf, PLOT_LINE, False, points, 2)
+            if len(points) <= 60:
+                for x, y in points:
+                    pygame.draw.circle(surf, PLOT_LINE, (int(x), int(y)), 3)
+
+        pygame.draw.rect(surf, PLOT_BORDER, area, 1)
 
     def draw(self, generation, current_round, total_rounds, best_agent, elapsed_time, phase_status):
         # Fundo
@@ -100,23 +204,14 @@ class Sidebar:
             self._draw_neural_net(best_agent.brain, self.margin_x, self.net_y_start, self.width - 2*self.margin_x, 300)
 
     def _draw_centered_text(self, text, y, size=14, color=(220, 220, 220)):
-        font = self.font_title if size > 18 else self.font_text
-        if size < 14: font = self.font_tiny
-        surf = font.render(str(text), True, color)
+        name, font_size, bold = self.font_title if size > 18 else self.font_text
+        if size < 14: name, font_size, bold = self.font_tiny
+        surf = render_text(str(text), name, font_size, color, bold)
         x = self.x_start + (self.width - surf.get_width()) // 2
         self.screen.blit(surf, (x, y))
 
-    def _draw_neural_net(self, brain, x_rel, y_abs, w, h):
-        abs_x = self.x_start + x_rel
-        t_surf = self.font_tiny.render("Rede Neural (Melhor Global)", True, (120, 120, 120))
-        self.screen.blit(t_surf, (self.x_start + (self.width/2) - t_surf.get_width()/2, y_abs - 20))
-
-        if not hasattr(brain, 'last_activations') or not brain.last_activations: return
-
-        activations = brain.last_activations
-        weights = brain.weights
-        layer_sizes = [brain.input_size] + brain.hidden_sizes + [brain.output_size]
-        
+    def _render_topology(self, brain, layer_sizes, abs_x, y_abs, w, h):
+        """Camada (transparente) com as conexões |peso| > 0.3; retorna (surface, posição, nós)"""
         node_positions = []
         layer_gap = w / (len(layer_sizes) - 1)
         
@@ -129,16 +224,40 @@ class Sidebar:
                 layer_nodes.append((lx, ly))
             node_positions.append(layer_nodes)
 
-        for i, layer_weights in enumerate(weights):
-            rows, cols = layer_weights.shape
-            for s in range(rows):
-                for t in range(cols):
-                    val = layer_weights[s][t]
-                    if abs(val) > 0.3:
-                        start, end = node_positions[i][s], node_positions[i+1][t]
-                        color = (0, 200, 0) if val > 0 else (200, 0, 0)
-                        width_line = max(1, int(abs(val)*1.5))
-                        pygame.draw.line(self.screen, color, start, end, width_line)
+        # Margem para a espessura das linhas mais grossas
+        max_weight = max(float(np.abs(layer_weights).max()) for layer_weights in brain.weights)
+        pad = max(1, int(max_weight * 1.5)) // 2 + 2
+        layer = pygame.Surface((int(w) + 2 * pad, int(h) + 2 * pad), pygame.SRCALPHA)
+        ox, oy = abs_x - pad, y_abs - pad
+
+        for i, layer_weights in enumerate(brain.weights):
+            for s, t in zip(*np.nonzero(np.abs(layer_weights) > 0.3)):
+                val = layer_weights[s, t]
+                start, end = node_positions[i][s], node_positions[i+1][t]
+                color = (0, 200, 0) if val > 0 else (200, 0, 0)
+                width_line = max(1, int(abs(val)*1.5))
+                pygame.draw.line(layer, color, (start[0] - ox, start[1] - oy), (end[0] - ox, end[1] - oy), width_line)
+
+        return layer, (ox, oy), node_positions
+
+    def _draw_neural_net(self, brain, x_rel, y_abs, w, h):
+        abs_x = self.x_start + x_rel
+        name, font_size, bold = self.font_tiny
+        t_surf = render_text("Rede Neural (Melhor Global)", name, font_size, (120, 120, 120), bold)
+        self.screen.blit(t_surf, (self.x_start + (self.width/2) - t_surf.get_width()/2, y_abs - 20))
+
+        if not hasattr(brain, 'last_activations') or not brain.last_activations: return
+
+        activations = brain.last_activations
+        layer_sizes = [brain.input_size] + brain.hidden_sizes + [brain.output_size]
+
+        # Conexões só mudam com os pesos: renderizadas uma vez por cérebro distinto
+        key = (brain.fingerprint(), tuple(layer_sizes), abs_x, y_abs, w, h)
+        if key != self._net_key:
+            self._net_key = key
+            self._net_layer, self._net_offset, self._net_nodes = self._render_topology(brain, layer_sizes, abs_x, y_abs, w, h)
+        self.screen.blit(self._net_layer, self._net_offset)
+        node_positions = self._net_nodes
 
         for i, nodes in enumerate(node_positions):
             for j, pos in enumerate(nodes):
@@ -0,0 +1,29 @@
+import functools
+import pygame
+
+# ========================
+# CACHE DE FONTES E TEXTOS
+# ========================
+# SysFont procura a fonte no sistema a cada chamada e font.render rasteriza o texto de novo.
+# Aqui cada fonte é criada uma vez e cada texto renderizado fica guardado por
+# (texto, fonte, tamanho, cor, negrito); os menos usados saem depois de TEXT_CACHE_SIZE.
+
+TEXT_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=None)
+def get_font(name, size, bold=False):
+    """pygame.font.SysFont criada uma única vez por (nome, tamanho, negrito)"""
+    return pygame.font.SysFont(name, size, bold=bold)
+
+
+@functools.lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, name, size, color, bold=False):
+    """Surface do texto com antialias (compartilhada: só faça blit, não desenhe nela)"""
+    return get_font(name, size, bold).render(text, True, color)
+
+
+def clear():
+    """Descarta fontes e textos (obrigatório antes de um novo pygame.init depois de pygame.quit)"""
+    render_text.cache_clear()
+    get_font.cache_clear()
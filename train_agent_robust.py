@@ -1,20 +1,23 @@
-import pygame
-import pickle
 import os
-import math
-import random 
 from datetime import datetime
-import numpy as np
 
-from quadra import Quadra
-from redeneural import RedeNeural
-from sidebar import Sidebar 
+from populacao import Populacao, Individuo
+from evaluator import MatchEvaluator, grid_geometry
+from checkpoint import Checkpoint
+from seeds import SeedStreams
+from replay import record_best
+from perf import timers
+from modelo import save_model, MODEL_EXT
 import config
 
+# Em modo headless nada de pygame (nem a janela/Sidebar, que dependem dele)
+if not config.HEADLESS:
+    from training_view import TrainingView
+
 # --- CONFIGURAÇÕES DE TREINO ROBUSTO ---
-TIME_PER_MATCH = 10      
+TICKS_PER_MATCH = 10 * config.TICKS_PER_SECOND # Duração da partida em ticks (10s de jogo)
 MATCHES_PER_AGENT = 3     
-POPULATION_SIZE = config.ROWS * config.COLUMNS * 2 
+POPULATION_SIZE = config.QUADRAS * 2 
 ELITISM_PERCENT = 0.1     
 
 # --- CONFIGURAÇÕES DE FASES (Exploração vs Refinamento) ---
@@ -30,44 +33,13 @@ MUT_SCALE_2 = 0.25
 MUT_RATE_REFINE = 0.08   # Corrigido de 0.8 para 0.08 para condizer com "Ajuste fino"
 MUT_SCALE_REFINE = 0.10  
 
-class Candidate:
-    def __init__(self, brain):
-        self.brain = brain
-        self.fitness = 0 
-
 def save_best_model(brain, prefix):
     if not os.path.exists("models"): os.makedirs("models")
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"models/best_{prefix}_{timestamp}.pkl"
-    with open(filename, 'wb') as f: pickle.dump(brain, f)
+    filename = f"models/best_{prefix}_{timestamp}{MODEL_EXT}"
+    save_model(brain, filename, meta={'prefix': prefix})
     print(f"✅ Modelo {prefix} salvo: {filename}")
 
-def evolve_candidates(candidate_list, target_size, mutation_rate, mutation_scale):
-    candidate_list.sort(key=lambda x: x.fitness, reverse=True)
-    new_candidates = []
-    
-    # Elitismo
-    num_elites = int(target_size * ELITISM_PERCENT)
-    if num_elites < 1: num_elites = 1
-    
-    for i in range(num_elites):
-        if i < len(candidate_list):
-            new_candidates.append(Candidate(candidate_list[i].brain.copy()))
-            
-    # Reprodução
-    remaining = target_size - len(new_candidates)
-    parent_pool = candidate_list[:int(len(candidate_list)/2)]
-    if not parent_pool: parent_pool = candidate_list
-    
-    for _ in range(remaining):
-        parent = np.random.choice(parent_pool)
-        child_brain = parent.brain.copy()
-        # Usa os parâmetros dinâmicos passados
-        child_brain.mutate(mutation_rate=mutation_rate, mutation_scale=mutation_scale)
-        new_candidates.append(Candidate(child_brain))
-        
-    return new_candidates, candidate_list[0].fitness
-
 def get_phase_params(total_goals):
     """Retorna (Rate, Scale, NomeDaFase) baseado no histórico de gols"""
     if total_goals == 0:
@@ -78,12 +50,18 @@ def get_phase_params(total_goals):
         return MUT_RATE_REFINE, MUT_SCALE_REFINE, "REFINE"
 
 def main():
-    pygame.init()
-    screen = pygame.display.set_mode((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
-    sidebar = Sidebar(screen, config.GAME_WIDTH, config.SIDEBAR_WIDTH, config.WINDOW_HEIGHT)
-    pygame.display.set_caption(f"Neural HaxBall - Robust Training")
+    view = None
+    sidebar = None
+    if not config.HEADLESS:
+        view = TrainingView(f"Neural HaxBall - Robust Training")
+        sidebar = view.sidebar
+
+    # Todos os sorteios do treino saem de streams da semente (--seed=N repete o treino)
+    streams = SeedStreams(config.SEED)
+
+    # Partidas rodam em lote (e em paralelo com --workers=N no headless)
+    evaluator = MatchEvaluator('robust', config.WORKERS)
 
-    clock = pygame.time.Clock()
     pop_size_side = int(POPULATION_SIZE / 2)
     
     # --- CONTADORES DE GOLS PARA CONTROLE DE FASE ---
@@ -98,183 +76,144 @@ def main():
     except:
         input_sz = 11 # Fallback caso não esteja no config
 
-    pop_left = [Candidate(RedeNeural(input_size=input_sz)) for _ in range(pop_size_side)]
-    pop_right = [Candidate(RedeNeural(input_size=input_sz)) for _ in range(pop_size_side)]
+    # Cada lado é uma matriz (indivíduos x genoma)
+    pop_left = Populacao(pop_size_side, input_size=input_sz, rng=streams.population(0))
+    pop_right = Populacao(pop_size_side, input_size=input_sz, rng=streams.population(1))
     
     generation = 1
-    if len(sidebar.fitness_history) > 0:
+    if sidebar and len(sidebar.fitness_history) > 0:
         generation = len(sidebar.fitness_history) + 1
+
+    # Checkpoint do treino inteiro (populações, RNGs, contadores); --resume continua de onde parou
+    checkpoint = Checkpoint("train_agent_robust")
+    if config.RESUME and checkpoint.exists():
+        generation, _, history = checkpoint.load({'left': pop_left, 'right': pop_right}, streams)
+        # (os gols da fase salvos são só registro: a fase recomeça do zero a cada geração)
+        if sidebar:
+            sidebar.load_history(history)
+        print(f"Retomando do checkpoint: Geração {generation}")
+    else:
+        checkpoint.reset()
+    print(f"Semente dos sorteios: {streams.entropy}")
     
     running_program = True
     
     while running_program:
-        # Zera fitness acumulado
-        for c in pop_left: c.fitness = 0
-        for c in pop_right: c.fitness = 0
-        
+        # Fitness acumulado começa zerado (Populacao.evolve zera a cada geração)
+        # e os gols da fase contam só a geração atual
+        total_goals_left = 0
+        total_goals_right = 0
+
         print(f"--- Geração {generation} ---")
-        indices_left = list(range(len(pop_left)))
-        indices_right = list(range(len(pop_right)))
+        indices_left = list(range(pop_left.size))
+
+        # Pareamentos de cada round. Partida i: pop_left[indices_left[i]] x pop_right[indices_right[i]],
+        # com uma semente por partida, sorteada aqui: não depende de como as partidas são divididas
+        pairings = [streams.pairing(generation, match_round).permutation(pop_right.size).tolist()
+                    for match_round in range(1, MATCHES_PER_AGENT + 1)]
+        rounds = [([pop_left.lote(indices_left), pop_right.lote(indices_right)],
+                   streams.match_seeds(generation, match_round, len(indices_left)))
+                  for match_round, indices_right in enumerate(pairings, 1)]
+        # Sem janela os rounds (independentes) viram uma fila só: a quadra que termina cedo
+        # já começa a próxima partida, sem esperar o fim do round
+        streamed = evaluator.run_rounds(rounds, TICKS_PER_MATCH) if view is None else None
 
         # Loop de Rounds
         for match_round in range(1, MATCHES_PER_AGENT + 1):
-            random.shuffle(indices_right)
-            quadras = []
-            agent_to_candidate_map = {}
-            active_agents_left = []
-            active_agents_right = []
-            
-            cell_width = config.GAME_WIDTH / config.COLUMNS
-            cell_height = config.WINDOW_HEIGHT / config.ROWS
-
-            for i in range(len(pop_left)):
-                row = i // config.COLUMNS
-                col = i % config.COLUMNS
-                cx = col * cell_width
-                cy = row * cell_height
-                q = Quadra(screen, (cx, cy), (cx + cell_width, cy + cell_height), ['agent', 'agent'])
-                quadras.append(q)
-                
-                cand_L = pop_left[indices_left[i]]
-                cand_R = pop_right[indices_right[i]]
-                
-                for agent in q.players:
-                    if agent.type == 'AGENT':
-                        agent.fitness = 0 
-                        if agent.team == 0:
-                            agent.brain = cand_L.brain
-                            agent_to_candidate_map[agent] = cand_L
-                            active_agents_left.append(agent)
-                        else:
-                            agent.brain = cand_R.brain
-                            agent_to_candidate_map[agent] = cand_R
-                            active_agents_right.append(agent)
-
-            start_time = pygame.time.get_ticks()
-            running_match = True
-            
-            while running_match:
-                clock.tick(60) 
-
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        running_program = False
-                        running_match = False
-                    if event.type == pygame.KEYDOWN and event.key == pygame.K_q:
-                        best_L = max(pop_left, key=lambda c: c.fitness)
-                        save_best_model(best_L.brain, "LEFT_MANUAL")
-                        best_R = max(pop_right, key=lambda c: c.fitness)
-                        save_best_model(best_R.brain, "RIGHT_MANUAL")
-                        running_program = False
-                        running_match = False
-
-                elapsed = (pygame.time.get_ticks() - start_time) / 1000
-                if elapsed >= TIME_PER_MATCH:
-                    running_match = False
-
-                screen.fill((0, 0, 0))
-                ended = True
-                
-                for q in quadras:
-                    if q.status == 0: ended = False
-                    q.update()
-                    
-                    for agent in q.players:
-                        if agent.type != 'AGENT' or q.status != 0: continue
-                        
-                        # 1. Pressão / Ataque
-                        ball_relative_x = (q.ball.x - q.begin[0]) / q.largura
-                        reward = 0
-                        if agent.team == 0:
-                            if ball_relative_x > 0.5: reward = (0.02 + ((ball_relative_x - 0.5) * 0.1))/10
-                            else: agent.fitness -= 0.01
-                        elif agent.team == 1:
-                            if ball_relative_x < 0.5: reward = (0.02 + ((0.5 - ball_relative_x) * 0.1))/10
-                            else: agent.fitness -= 0.01
-                        agent.fitness += reward
-
-                        # 2. Gol e DETECÇÃO DE FASE
-                        if q.pontuou:
-                            # Contagem de Gols para evolução de fase
-                            if agent.team == 0:
-                                total_goals_left += 1
-                                print(f"> GOL ESQUERDA! Total: {total_goals_left}")
-                            elif agent.team == 1:
-                                total_goals_right += 1
-                                print(f"> GOL DIREITA! Total: {total_goals_right}")
-
-                            my_score = q.score[agent.team]
-                            enemy_score = q.score[1 - agent.team]
-                            agent.fitness += my_score * 50
-                            agent.fitness -= enemy_score * 20
-                            
-                            if q.players[-1] == agent: q.pontuou = False 
-
-                        agent.fitness -= 0.001 
-                        if agent.walking == 0: agent.fitness -= 0.1 
-
-                if ended: running_match = False
-
-                if active_agents_left and active_agents_right:
-                    best_vis_L = max(active_agents_left, key=lambda a: a.fitness)
-                    best_vis_R = max(active_agents_right, key=lambda a: a.fitness)
-                    
-                    pygame.draw.rect(screen, config.LEFT_WIN_COLOR, [best_vis_L.begin[0], best_vis_L.begin[1], best_vis_L.end[0]-best_vis_L.begin[0], best_vis_L.end[1]-best_vis_L.begin[1]], 4)
-                    pygame.draw.rect(screen, config.RIGHT_WIN_COLOR, [best_vis_R.begin[0], best_vis_R.begin[1], best_vis_R.end[0]-best_vis_R.begin[0], best_vis_R.end[1]-best_vis_R.begin[1]], 4)
-                    
-                    # Sidebar
-                    best_cand_global = max(pop_left + pop_right, key=lambda c: c.fitness)
-                    
-                    # Pega status baseado nos gols
-                    _, _, status_L = get_phase_params(total_goals_left)
-                    _, _, status_R = get_phase_params(total_goals_right)
-                    status_txt = f"L: {status_L}({total_goals_left}) | R: {status_R}({total_goals_right})"
-
-                    sidebar.draw(generation, match_round, MATCHES_PER_AGENT, best_cand_global, TIME_PER_MATCH - elapsed, status_txt)
-
-                pygame.display.flip()
-            
-            if not running_program: break
+            indices_right = pairings[match_round - 1]
+            brains, seeds = rounds[match_round - 1]
+
+            on_tick = None
+            if view is not None:
+                begin, end = grid_geometry(len(indices_left))
+                view.begin_round(begin, end, ['agent', 'agent'])
+
+                def on_tick(batch, fitness, goals, ticks):
+                    # Entre um frame e outro a simulação segue sem desenhar
+                    if not view.frame_due():
+                        return
+                    action = view.poll_events()
+                    if action == 'save':
+                        save_best_model(pop_left.brain(pop_left.best()), "LEFT_MANUAL")
+                        save_best_model(pop_right.brain(pop_right.best()), "RIGHT_MANUAL")
+                    if action is not None:
+                        return False
+
+                    # Sidebar: melhor acumulado entre os dois lados (e a quadra onde ele joga agora)
+                    if pop_left.fitness.max() >= pop_right.fitness.max():
+                        k = pop_left.best()
+                        best_cand_global = Individuo(pop_left.brain(k), pop_left.fitness[k], indices_left.index(k), 0)
+                    else:
+                        k = pop_right.best()
+                        best_cand_global = Individuo(pop_right.brain(k), pop_right.fitness[k], indices_right.index(k), 1)
+
+                    # Pega status baseado nos gols (inclui os do round em andamento)
+                    goals_L = total_goals_left + int(goals[:, 0].sum())
+                    goals_R = total_goals_right + int(goals[:, 1].sum())
+                    _, _, status_L = get_phase_params(goals_L)
+                    _, _, status_R = get_phase_params(goals_R)
+                    status_txt = f"L: {status_L}({goals_L}) | R: {status_R}({goals_R})"
+
+                    view.draw(batch, fitness,
+                              [(0, config.LEFT_WIN_COLOR, 4), (1, config.RIGHT_WIN_COLOR, 4)],
+                              (generation, match_round, MATCHES_PER_AGENT, (TICKS_PER_MATCH - ticks) / config.TICKS_PER_SECOND, status_txt),
+                              best_cand_global)
+
+            if streamed is not None:
+                result = streamed[match_round - 1]
+            else:
+                result = evaluator.run(brains, TICKS_PER_MATCH, seeds, on_tick)
+            if result is None:
+                running_program = False
+                break
+            fitness, goals, _ = result
+            # Replay das melhores partidas (simuladas de novo a partir das sementes)
+            if config.RECORD_BEST and generation % config.RECORD_EVERY == 0:
+                record_best("train_agent_robust", generation, match_round, evaluator.mode, brains, TICKS_PER_MATCH, seeds, fitness)
             
             # Soma Fitness do Round
-            for q in quadras:
-                for agent in q.players:
-                    if agent.type == 'AGENT':
-                        my_score = q.score[agent.team]
-                        enemy_score = q.score[1 - agent.team]
-                        agent.fitness += my_score * 100
-                        agent.fitness -= enemy_score * 50
-                        candidate = agent_to_candidate_map[agent]
-                        candidate.fitness += agent.fitness
+            pop_left.fitness[indices_left] += fitness[:, 0]
+            pop_right.fitness[indices_right] += fitness[:, 1]
+
+            # Contagem de Gols para evolução de fase
+            total_goals_left += int(goals[:, 0].sum())
+            total_goals_right += int(goals[:, 1].sum())
+            print(f"> Round {match_round} | Gols ESQUERDA: {total_goals_left} | DIREITA: {total_goals_right}")
 
         if not running_program: break
 
         # --- AUTO SAVE ---
         if generation % 20 == 0:
-            best_L = max(pop_left, key=lambda c: c.fitness)
-            save_best_model(best_L.brain, f"AUTO_L_GEN{generation}")
-            best_R = max(pop_right, key=lambda c: c.fitness)
-            save_best_model(best_R.brain, f"AUTO_R_GEN{generation}")
+            save_best_model(pop_left.brain(pop_left.best()), f"AUTO_L_GEN{generation}")
+            save_best_model(pop_right.brain(pop_right.best()), f"AUTO_R_GEN{generation}")
             
         # --- EVOLUÇÃO COM PARÂMETROS ADAPTATIVOS (3 FASES) ---
         
         # Define parametros para Esquerda
         rate_L, scale_L, _ = get_phase_params(total_goals_left)
-        pop_left, fit_L = evolve_candidates(pop_left, pop_size_side, rate_L, scale_L)
+        fit_L = pop_left.evolve(ELITISM_PERCENT, rate_L, scale_L, streams.evolution(0, generation))
         
         # Define parametros para Direita
         rate_R, scale_R, _ = get_phase_params(total_goals_right)
-        pop_right, fit_R = evolve_candidates(pop_right, pop_size_side, rate_R, scale_R)
+        fit_R = pop_right.evolve(ELITISM_PERCENT, rate_R, scale_R, streams.evolution(1, generation))
         
         best_global = max(fit_L, fit_R)
         print(f"Gen {generation} Finalizada | Best (Avg): {best_global/MATCHES_PER_AGENT:.2f}")
+        # Onde foi o tempo da geração (física, rede, recompensas, desenho, GA)
+        print(timers.log_line(timers.end_generation()))
         
-        sidebar.update_history(best_global / MATCHES_PER_AGENT)
+        if sidebar:
+            sidebar.update_history(best_global / MATCHES_PER_AGENT)
+        checkpoint.append_history(best_global / MATCHES_PER_AGENT)
         generation += 1
-        total_goals_left = 0
-        total_goals_right = 0
 
-    pygame.quit()
+        if (generation - 1) % config.CHECKPOINT_EVERY == 0:
+            checkpoint.save(generation, {'left': pop_left, 'right': pop_right},
+                            {'total_goals_left': total_goals_left, 'total_goals_right': total_goals_right}, streams)
+
+    evaluator.close()
+    if view is not None:
+        view.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,265 @@
+import random
+import time
+import numpy as np
+import pygame
+
+import config
+from quadra import Quadra
+from sidebar import Sidebar
+from populacao import Individuo
+from perf import timers
+import text_cache
+
+
+class TrainingView:
+    def __init__(self, caption):
+        """Janela dos treinadores: desenha as quadras de um ArenaBatch, os destaques e a Sidebar"""
+        pygame.init()
+        self.screen = pygame.display.set_mode((config.WINDOW_WIDTH, config.WINDOW_HEIGHT))
+        self.sidebar = Sidebar(self.screen, config.GAME_WIDTH, config.SIDEBAR_WIDTH, config.WINDOW_HEIGHT)
+        self.caption = caption
+
+        self.clock = pygame.time.Clock()
+        self.turbo = config.TURBO
+
+        # Simulação desacoplada do desenho: um frame a cada ticks_per_frame ticks,
+        # ou (auto_speed) a cada 1/RENDER_FPS segundos, com a física rodando solta no meio
+        self.ticks_per_frame = max(1, config.TICKS_PER_FRAME)
+        self.auto_speed = config.AUTO_TICKS_PER_FRAME
+        self._ticks_since_frame = 0
+        self._last_frame = time.perf_counter()
+        self._update_caption()
+
+        # Modo foco: uma Quadra ampliada mostrando a quadra do líder (focus_arena) do lote
+        self.focus = config.FOCUS_VIEW
+        self.focus_arena = None
+        self._focus_hold = 0
+        self._round = None
+
+        self.quadras = []
+        self._layout = None      # (células, jogadores) das Quadras atuais, para reaproveitá-las
+        self.rng = random.Random()
+        self.sidebar_area = (config.GAME_WIDTH, 0, config.SIDEBAR_WIDTH, config.WINDOW_HEIGHT)
+
+        # Fundo pré-renderizado das quadras: 'field' só com a parte estática (gramado, linhas,
+        # traves) e 'background' = field + placares + quadras encerradas. Cada frame só
+        # restaura o fundo onde algo se mexeu e manda esses retângulos para display.update.
+        self.field = None
+        self.background = None
+        self._painted = []       # (placar, status) de cada quadra já pintado no background
+        self._active = []        # quadras ainda desenhadas a cada frame (encerradas já estão no fundo)
+        self._moving = []        # retângulos desenhados por cima do fundo no último frame
+        self._full_redraw = True
+
+    def begin_round(self, begin, end, players):
+        """
+        Prepara as Quadras da rodada (begin, end: cantos na tela). Elas só desenham: o estado vem
+        do ArenaBatch, em coordenadas da arena canônica, transformado para a tela a cada frame.
+        Com a mesma grade da rodada anterior as Quadras e o campo pré-renderizado são reaproveitados.
+        """
+        self._round = (begin, end, players)
+        self.focus_arena = None
+        if self.focus:
+            # Uma Quadra com a proporção da arena canônica, do maior tamanho que cabe na área de jogo
+            w = config.ARENA_WIDTH
+            h = config.ARENA_HEIGHT
+            scale = min(config.GAME_WIDTH / w, config.WINDOW_HEIGHT / h)
+            x0 = int((config.GAME_WIDTH - w * scale) / 2)
+            y0 = int((config.WINDOW_HEIGHT - h * scale) / 2)
+            cells = [((x0, y0), (x0 + int(w * scale), y0 + int(h * scale)))]
+        else:
+            n = min(len(begin), config.ROWS * config.COLUMNS)
+            cells = [(tuple(begin[i]), tuple(end[i])) for i in range(n)]
+
+        layout = (cells, list(players))
+        if layout == self._layout:
+            for q in self.quadras:
+                q.reset()
+            self.background.blit(self.field, (0, 0))
+        else:
+            self._build_quadras(cells, players)
+            self._layout = layout
+
+        self._painted = [None] * len(self.quadras)
+        self._active = list(range(len(self.quadras)))
+        self._moving = []
+        self._full_redraw = True
+
+    def _build_quadras(self, cells, players):
+        # Cores e IDs são só visuais: saem de um random.Random próprio, longe dos sorteios do treino
+        self.quadras = [Quadra(self.screen, b, e, players, rng=self.rng) for b, e in cells]
+
+        self.field = pygame.Surface((config.GAME_WIDTH, config.WINDOW_HEIGHT))
+        self.field.fill((0, 0, 0))
+        for q in self.quadras:
+            q.draw_field(self.field)
+        self.background = self.field.copy()
+
+    def _repaint_background(self, q):
+        # Placar ou status mudou: refaz a quadra no background a partir do campo estático.
+        # Encerrada, ela não se mexe mais: jogadores e máscara ficam no fundo.
+        self.background.blit(self.field, q.area, q.area)
+        self.background.set_clip(q.area)
+        q.draw_score(self.background)
+        if q.status != 0:
+            q.draw_entities(self.background)
+            q.draw_result(self.background)
+        self.background.set_clip(None)
+
+    def _update_caption(self):
+        speed = "auto" if self.auto_speed else f"{self.ticks_per_frame} ticks/frame"
+        pygame.display.set_caption(f"{self.caption} | {speed}")
+
+    def frame_due(self):
+        """Chamado a cada tick: True quando este tick deve ser desenhado (e os eventos tratados)"""
+        self._ticks_since_frame += 1
+        if self.auto_speed:
+            due = time.perf_counter() - self._last_frame >= 1 / config.RENDER_FPS
+        else:
+            due = self._ticks_since_frame >= self.ticks_per_frame
+        if due:
+            self._ticks_since_frame = 0
+            self._last_frame = time.perf_counter()
+        return due
+
+    def poll_events(self):
+        """Limita o FPS (fora do turbo) e trata os eventos. Retorna 'quit', 'save' (tecla Q) ou None"""
+        t = timers.start()
+        if not self.turbo:
+            self.clock.tick(60)
+
+        action = None
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                action = 'quit'
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_q:
+                    action = 'save'
+                if event.key == pygame.K_t:
+                    self.turbo = not self.turbo
+                # Velocidade do espectador
+                if event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                    self.ticks_per_frame = min(self.ticks_per_frame * 2, config.MAX_TICKS_PER_FRAME)
+                    self.auto_speed = False
+                    self._update_caption()
+                if event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                    self.ticks_per_frame = max(self.ticks_per_frame // 2, 1)
+                    self.auto_speed = False
+                    self._update_caption()
+                if event.key == pygame.K_a:
+                    self.auto_speed = not self.auto_speed
+                    self._update_caption()
+                # Alterna grade <-> foco no líder (só o desenho muda, a simulação segue igual)
+                if event.key == pygame.K_f:
+                    self.focus = not self.focus
+                    if self._round is not None:
+                        self.begin_round(*self._round)
+        timers.lap('events', t)
+        return action
+
+    def best_agent(self, batch, fitness, slots):
+        """Individuo com maior fitness da rodada entre as quadras visíveis (no foco: todas), nos slots dados"""
+        n = self._visible(fitness)
+        best = None
+        for s in slots:
+            i = int(np.argmax(fitness[:n, s]))
+            if best is None or fitness[i, s] >= best.fitness:
+                best = Individuo(batch.lotes[s].rede(i), fitness[i, s], i, s)
+        return best
+
+    def _visible(self, fitness):
+        # Quadras que podem ser destacadas: no foco qualquer uma do lote, na grade só as desenhadas
+        return len(fitness) if self.focus else len(self.quadras)
+
+    def _update_focus(self, fitness, highlights, best):
+        # Líder = quadra do Individuo da Sidebar ou, sem ele, a do melhor do primeiro destaque
+        if best is not None and best.arena is not None:
+            leader = best.arena
+        else:
+            leader = int(np.argmax(fitness[:, highlights[0][0]])) if highlights else 0
+
+        if self._focus_hold > 0:
+            self._focus_hold -= 1
+        if leader != self.focus_arena and (self.focus_arena is None or self._focus_hold == 0):
+            self.focus_arena = leader
+            self._focus_hold = config.FOCUS_HOLD_FRAMES
+            # Outra quadra: o fundo (placar/resultado) precisa ser refeito
+            self._painted = [None]
+
+    def draw(self, batch, fitness, highlights, sidebar_info, best=None):
+        """
+        highlights: [(slot, cor, espessura)] contorna a quadra do melhor agente do slot
+        sidebar_info: (geração, round, total de rounds, tempo restante, status da fase)
+        best: Individuo mostrado na Sidebar (com arena/slot, as ativações vêm do lote)
+        """
+        t = timers.start()
+        if self.focus:
+            self._update_focus(fitness, highlights, best)
+            batch.sync_to_quadra(self.quadras[0], self.focus_arena, scaled=True)
+        else:
+            for i in self._active:
+                batch.sync_to_quadra(self.quadras[i], i, scaled=True)
+
+        dirty = list(self._moving)
+        for i in self._active:
+            q = self.quadras[i]
+            state = (q.score[0], q.score[1], q.status)
+            if state != self._painted[i]:
+                self._painted[i] = state
+                self._repaint_background(q)
+                dirty.append(q.area)
+
+        # Apaga o frame anterior só onde algo foi desenhado por cima do fundo
+        if self._full_redraw:
+            self.screen.blit(self.background, (0, 0))
+        else:
+            for rect in dirty:
+                self.screen.blit(self.background, rect, rect)
+
+        moving = []
+        for i in self._active:
+            if self.quadras[i].status == 0:
+                moving += self.quadras[i].draw_entities()
+        # Quadra encerrada já foi pintada no fundo com a máscara: não é mais sincronizada nem
+        # desenhada (no foco a única Quadra troca de partida, então fica sempre ativa)
+        if not self.focus:
+            self._active = [i for i in self._active if self.quadras[i].status == 0]
+
+        n = self._visible(fitness)
+        for slot, color, width in highlights:
+            i = int(np.argmax(fitness[:n, slot]))
+            if self.focus:
+                # Contorna a quadra em foco se ela é a do melhor desse slot
+                if i != self.focus_arena:
+                    continue
+                i = 0
+            q = self.quadras[i]
+            moving.append(pygame.draw.rect(self.screen, color, [q.begin[0], q.begin[1], q.largura, q.altura], width))
+
+        if self.focus:
+            label = text_cache.render_text(f"Quadra {self.focus_arena + 1}/{len(fitness)}", None, 32, config.TEXT_COLOR)
+            moving.append(self.screen.blit(label, (10, 10)))
+        self._moving = moving
+        dirty += moving
+
+        # Ativações do cérebro em destaque vêm do lote
+        if best is not None and best.arena is not None:
+            activations = batch.lotes[best.slot].activations_of(best.arena)
+            if activations:
+                best.brain.last_activations = activations
+
+        t = timers.lap('draw', t)
+
+        generation, current_round, total_rounds, remaining, status = sidebar_info
+        self.sidebar.draw(generation, current_round, total_rounds, best, remaining, status)
+        t = timers.lap('sidebar', t)
+        if self._full_redraw:
+            pygame.display.flip()
+            self._full_redraw = False
+        else:
+            pygame.display.update(dirty + [self.sidebar_area])
+        timers.lap('flip', t)
+
+    def close(self):
+        text_cache.clear()
+        pygame.quit()